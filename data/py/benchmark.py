@@ -0,0 +1,211 @@
+'''
+Benchmark the pipeline on synthetic surveys.
+A survey of the same shape as the real one (the four category CSV files, one column per informant) is
+generated at several scales, optionally with extra languages and items, and every stage of the pipeline
+is timed on it: CSV to JSON (step 1), nodes and links (step 2), the networkx/pyvis page (step 3), the
+Sankey flows and the rendering of the Sankey page with fig.to_html (step 4). The peak memory of every
+stage is measured in a separate run with tracemalloc, so the tracing does not distort the timings. The
+figure cache is not used, every run renders the figures.
+Input: none, the CSV files are generated in a temporary directory
+Output: JSON file with the wall time, peak memory and output size of every stage and scale
+Usage: python benchmark.py [--informants N ...] [--languages N] [--items N] [--repeat N] [--no-memory] [--output FILE]
+'''
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from languageweb import paths
+from languageweb.categories import CATEGORIES, dataset_categories
+from languageweb.colors import languages_colors_links, languages_colors_nodes
+from languageweb.csvjson import csv_to_json
+from languageweb.flows import all_flows
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import build_nodes_links, read_labels
+from languageweb.sankey import render_figures, write_html
+from languageweb.survey import load_survey
+
+default_output = os.path.join(paths.CACHE_DIR, 'benchmark.json')
+
+# Relative frequency of the languages in the generated answers, roughly as in the interviews.
+language_weights = {
+    'Turkish': 30,
+    'Kurmanji': 15,
+    'No language given': 15,
+    'Şexbizinî': 10,
+    'German': 10,
+    'French': 8,
+    'Other language': 6,
+    'Dutch': 3,
+}
+
+
+######################################################################################################################
+
+def register_languages(count):
+    '''Add count synthetic languages to the color tables (they are only known to this process) and return them.'''
+    languages = []
+    for i in range(count):
+        language = f'Language {i + 1}'
+        languages_colors_links.setdefault(language, 'rgba(128, 128, 128, 0.8)')
+        languages_colors_nodes.setdefault(language, 'rgba(128, 128, 128, 1.0)')
+        languages.append(language)
+    return languages
+
+
+def generate_survey(csv_dir, informants, extra_languages=(), extra_items=0, seed=1):
+    '''
+    Write synthetic category CSV files with the given number of informants to csv_dir and return the
+    categories pointing to them. Every category has as many items as the real one plus extra_items.
+    '''
+    rng = random.Random(seed)
+    languages = list(language_weights) + list(extra_languages)
+    weights = list(language_weights.values()) + [2] * len(extra_languages)
+    header_ids = [str(i + 1) for i in range(informants)]
+
+    for category in CATEGORIES:
+        csv_path = os.path.join(csv_dir, os.path.basename(category.csv_path))
+        n_items = len(read_labels(category.csv_path, category.label_column)) + extra_items
+        with open(csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+            csvWriter = csv.writer(csvf, delimiter=';')
+            csvWriter.writerow([category.label_column] + header_ids)
+            for item in range(n_items):
+                row = [f'{category.node_type} {item + 1}']
+                for _ in range(informants):
+                    # One to three distinct languages per answer, in the "A, B" form of the survey.
+                    answer = dict.fromkeys(rng.choices(languages, weights, k=rng.choice((1, 1, 2, 3))))
+                    row.append(', '.join(answer))
+                csvWriter.writerow(row)
+    return dataset_categories(csv_dir)
+
+
+######################################################################################################################
+
+def measure(run, repeat=1, memory=True):
+    '''Run a stage repeat times and once more under tracemalloc; return its best time and peak memory.'''
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def file_size(*file_paths):
+    return sum(os.path.getsize(path) for path in file_paths if os.path.exists(path))
+
+
+def benchmark_pipeline(work_dir, categories, repeat=1, memory=True, workers=1):
+    '''Run the stages of the pipeline on the categories, writing all outputs to work_dir.'''
+    json_path = os.path.join(work_dir, 'all_informants_interlocutors.json')
+    nodes_links_path = os.path.join(work_dir, 'nodes_links.json')
+    network_path = os.path.join(work_dir, 'network.html')
+    sankey_path = os.path.join(work_dir, 'sankey.html')
+
+    def json_data():
+        csv_to_json([(c.csv_path, c.label_column) for c in categories], json_path)
+
+    def nodes_links():
+        build_nodes_links(json_path, nodes_links_path, categories)
+
+    def network():
+        build_network_html(nodes_links_path, network_path, cache=None)
+
+    # The flows of the last run of sankey_flows are the input of sankey_html.
+    flows = {}
+
+    def sankey_flows():
+        flows.update(all_flows(load_survey(categories), categories))
+
+    def sankey_html():
+        figures_html = render_figures(categories, flows, workers=workers, cache=None)
+        write_html(sankey_path, categories, figures_html=figures_html)
+
+    stages = {}
+    for name, run, outputs in [
+        ('csv_to_json', json_data, [json_path]),
+        ('nodes_links', nodes_links, [nodes_links_path]),
+        ('network_html', network, [network_path]),
+        ('sankey_flows', sankey_flows, []),
+        ('sankey_html', sankey_html, [sankey_path]),
+    ]:
+        seconds, peak = measure(run, repeat, memory)
+        stages[name] = {'seconds': seconds, 'peak_bytes': peak, 'output_bytes': file_size(*outputs)}
+        print(f'  {name:<13} {seconds:9.3f} s' + (f' {peak / 2**20:10.1f} MiB' if peak is not None else ''))
+    return stages
+
+
+def git_commit():
+    '''Return the commit of the working tree, or None outside of a git checkout.'''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=paths.ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(informants=(100, 1000, 10000), languages=0, items=0, seed=1, repeat=1, memory=True, workers=1,
+         output=default_output):
+    extra_languages = register_languages(languages)
+    results = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'workers': workers,
+        'runs': [],
+    }
+
+    for n in informants:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print(f'{n} informants, {len(language_weights) + languages} languages, {items} extra items per category')
+            categories = generate_survey(work_dir, n, extra_languages, items, seed)
+            results['runs'].append({
+                'informants': n,
+                'languages': len(language_weights) + languages,
+                'items': sum(len(read_labels(c.csv_path, c.label_column)) for c in categories),
+                'csv_bytes': file_size(*(c.csv_path for c in categories)),
+                'stages': benchmark_pipeline(work_dir, categories, repeat, memory, workers),
+            })
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time every stage of the pipeline on synthetic surveys.')
+    parser.add_argument('--informants', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='numbers of informants to generate, e.g. 100 1000 10000 100000')
+    parser.add_argument('--languages', type=int, default=0, help='number of extra synthetic languages')
+    parser.add_argument('--items', type=int, default=0, help='number of extra items per category')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the generated answers')
+    parser.add_argument('--repeat', type=int, default=1, help='number of timed runs per stage, the best one is kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run measuring the peak memory')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes rendering the Sankey diagrams (the memory of worker processes is not traced)')
+    parser.add_argument('--output', default=default_output, help='results file (default: data/.cache/benchmark.json)')
+    args = parser.parse_args()
+    main(informants=args.informants, languages=args.languages, items=args.items, seed=args.seed,
+         repeat=args.repeat, memory=not args.no_memory, workers=args.workers, output=args.output)
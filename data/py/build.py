@@ -0,0 +1,48 @@
+'''
+Run the whole pipeline (steps 1 to 4) as one incremental build.
+The CSV files are validated first; invalid input stops the build before anything is converted or rendered.
+Every step is only re-run when the content of its inputs changed since the last build. The package
+modules implementing a step are inputs too, so edits to the color tables or the pyvis/plotly options
+trigger a rebuild. The stages are defined in languageweb/pipeline.py (also available as python -m languageweb build).
+Input: CSV files (or the workbooks in data/xlsx with --source xlsx) and the package modules
+Output: JSON files, network.html and sankey.html
+Usage: python build.py [--source csv|xlsx] [--force-xlsx] [--force] [--no-cache] [--assets remote|local|inline] [--lazy] [--report [FILE]] [--profile] [--trace-memory] [step ...]
+'''
+
+import argparse
+
+from languageweb import instrument, pipeline
+from languageweb.figcache import figure_cache
+from languageweb.assets import ASSET_MODES
+from languageweb.validate import ValidationError
+from languageweb.xlsx import ExportConflict
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally build the JSON data, network.html and sankey.html.')
+    parser.add_argument('steps', nargs='*', help='only run these steps, e.g. step3 step4')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the inputs did not change')
+    parser.add_argument('--no-cache', action='store_true', help='render all figures instead of reusing cached ones')
+    parser.add_argument('--assets', choices=ASSET_MODES, default='remote', help='asset mode of the HTML pages, see languageweb/assets.py')
+    parser.add_argument('--lazy', action='store_true', help='load the Sankey diagrams lazily from JSON files')
+    parser.add_argument('--source', choices=['csv', 'xlsx'], default='csv',
+                        help='build from the CSV files (csv) or update them from the workbooks first (xlsx)')
+    parser.add_argument('--force-xlsx', action='store_true',
+                        help='with --source xlsx, overwrite CSV files edited by hand with their workbooks')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.configure(args)
+
+    unknown = set(args.steps) - {stage.name for stage in pipeline.create_stages(source=args.source)}
+    if unknown:
+        parser.error('unknown step(s): ' + ', '.join(sorted(unknown)))
+
+    try:
+        pipeline.build(args.steps, force=args.force, assets=args.assets, lazy=args.lazy,
+                       cache=None if args.no_cache else figure_cache, source=args.source, force_xlsx=args.force_xlsx)
+    except (ValidationError, ExportConflict) as e:
+        parser.exit(1, f'{e}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+'''
+The language use web data pipeline (see data/README.md).
+The functions below build the outputs of the four steps; networkx, pyvis and plotly are only imported
+by the steps which need them. The command line interface is python -m languageweb.
+'''
+
+from languageweb.combinations import build_combinations
+from languageweb.csvjson import csv_to_json
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import build_nodes_links
+from languageweb.pipeline import build
+from languageweb.sankey import build_sankey_html
+from languageweb.stats import build_statistics
+from languageweb.subgraph import build_subgraph, build_views, filter_nodes_links
+from languageweb.survey import load_survey
+
+__all__ = [
+    'build',
+    'build_combinations',
+    'build_network_html',
+    'build_nodes_links',
+    'build_sankey_html',
+    'build_statistics',
+    'build_subgraph',
+    'build_views',
+    'csv_to_json',
+    'filter_nodes_links',
+    'load_survey',
+]
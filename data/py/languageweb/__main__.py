@@ -0,0 +1,219 @@
+'''
+Command line interface of the pipeline.
+Usage: python -m languageweb {xlsx,validate,json,nodes-links,network,subgraph,views,sankey,combinations,statistics,similarity,append,serve,build,batch,convert} [options]
+       (run from data/py, or with data/py on PYTHONPATH; see python -m languageweb COMMAND --help)
+'''
+
+import argparse
+
+from languageweb import batch, delta, instrument, paths, pipeline, server, xlsx
+from languageweb.assets import ASSET_MODES
+from languageweb.combinations import build_combinations
+from languageweb.csvjson import category_csv_files, csv_to_json
+from languageweb.figcache import figure_cache
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import NODES_LINKS_FORMATS, build_nodes_links, convert_nodes_links
+from languageweb.sankey import build_sankey_html
+from languageweb.similarity import METRICS, build_neighbours
+from languageweb.stats import build_statistics
+from languageweb.subgraph import VIEW_KINDS, build_subgraph, build_views
+from languageweb.validate import ValidationError, build_canonical, canonical_dataset, validate_dataset
+
+formats_help = 'indented JSON (json), compact columnar JSON (columnar) or NumPy arrays (npz), default: by the file name'
+cache_help = 'render all figures instead of reusing the cached ones'
+assets_help = 'load the JS/CSS libraries from CDNs (remote), from local copies in lib/ (local) or embed them (inline)'
+
+# Commands reading the CSV files; they validate them first and read the canonical dataset.
+CANONICAL_COMMANDS = ['json', 'nodes-links', 'sankey', 'combinations', 'statistics']
+
+
+def main(argv=None):
+    # The instrumentation options are accepted by every command.
+    common = argparse.ArgumentParser(add_help=False)
+    instrument.add_arguments(common)
+
+    parser = argparse.ArgumentParser(prog='python -m languageweb', description='Build the language use web data and pages.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('xlsx', parents=[common], help='update the CSV files from the changed sheets of the workbooks')
+    command.add_argument('--xlsx-dir', default=paths.XLSX_DIR, help='directory with the workbooks, default: data/xlsx')
+    command.add_argument('--force', action='store_true', help='parse every sheet and overwrite CSV files edited by hand')
+
+    command = commands.add_parser('validate', parents=[common], help='check the CSV files and write the canonical dataset')
+    command.add_argument('--output-dir', default=paths.CANONICAL_CSV_DIR, help='output directory, default: data/canonical')
+    command.add_argument('--check', action='store_true', help='only check the CSV files, do not write anything')
+
+    command = commands.add_parser('json', parents=[common], help='convert the CSV files to one JSON file (step 1)')
+    command.add_argument('--compact', action='store_true', help='write the JSON without indentation')
+
+    command = commands.add_parser('nodes-links', parents=[common], help='create nodes_links.json (step 2)')
+    command.add_argument('--output', default=paths.JSON_NODES_LINKS, help='output file, e.g. data/json/nodes_links.npz')
+    command.add_argument('--format', choices=NODES_LINKS_FORMATS, help=formats_help)
+
+    command = commands.add_parser('network', parents=[common], help='create network.html (step 3)')
+    command.add_argument('--physics', action='store_true', help='let the browser compute the layout instead')
+    command.add_argument('--no-cache', action='store_true', help=cache_help)
+    command.add_argument('--nodes-links', default=paths.JSON_NODES_LINKS, help='nodes and links file (.json, .columnar.json or .npz)')
+    command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+
+    command = commands.add_parser('subgraph', parents=[common], help='create a network page and/or file of a filtered subgraph')
+    command.add_argument('--language', action='append', help='keep the links to this language (repeatable)')
+    command.add_argument('--type', action='append', help='keep the links of this node type, e.g. media (repeatable)')
+    command.add_argument('--interview', action='append', help='keep the links of this interview ID (repeatable)')
+    command.add_argument('--html', help='network page of the subgraph, e.g. views/network-kurmanji-media.html')
+    command.add_argument('--output', help='nodes and links file of the subgraph (.json, .columnar.json or .npz)')
+    command.add_argument('--title', help='title of the page, default: Network')
+    command.add_argument('--physics', action='store_true', help='let the browser compute the layout instead')
+    command.add_argument('--no-cache', action='store_true', help=cache_help)
+    command.add_argument('--nodes-links', default=paths.JSON_NODES_LINKS, help='nodes and links file (.json, .columnar.json or .npz)')
+    command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+    subgraph_command = command
+
+    command = commands.add_parser('views', parents=[common], help='create the network views of every language and node type')
+    command.add_argument('--kinds', nargs='+', choices=VIEW_KINDS, default=VIEW_KINDS, help='views to create, default: both')
+    command.add_argument('--json-only', action='store_true', help='only write the JSON shards (data/json/subgraphs), no pages')
+    command.add_argument('--physics', action='store_true', help='let the browser compute the layout instead')
+    command.add_argument('--no-cache', action='store_true', help=cache_help)
+    command.add_argument('--nodes-links', default=paths.JSON_NODES_LINKS, help='nodes and links file (.json, .columnar.json or .npz)')
+    command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+
+    command = commands.add_parser('sankey', parents=[common], help='create sankey.html (step 4)')
+    command.add_argument('--workers', type=int, help='number of processes rendering the diagrams (1 = no process pool)')
+    command.add_argument('--no-cache', action='store_true', help=cache_help)
+    command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+    command.add_argument('--lazy', action='store_true', help='load every diagram from its own JSON file when it is shown')
+
+    command = commands.add_parser('combinations', parents=[common], help='count the language combinations, create combinations.html')
+    command.add_argument('--top', type=int, default=10, help='combinations per category shown as nodes of their own, default: 10')
+    command.add_argument('--min-count', type=int, default=1, help='answers a combination needs to be shown on its own')
+    command.add_argument('--workers', type=int, help='number of processes rendering the diagrams (1 = no process pool)')
+    command.add_argument('--no-cache', action='store_true', help=cache_help)
+    command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+
+    command = commands.add_parser('statistics', parents=[common], help='export the statistics index (JSON and CSV)')
+    command.add_argument('--output-dir', default=paths.STATISTICS_DIR, help='output directory, default: data/statistics')
+
+    command = commands.add_parser('similarity', parents=[common], help='index the most similar informants of every informant')
+    command.add_argument('-k', type=int, default=10, help='neighbours per informant, default: 10')
+    command.add_argument('--metric', choices=METRICS, default='jaccard', help='similarity of the profiles, default: jaccard')
+    command.add_argument('--output', default=paths.JSON_NEIGHBOURS, help='output file (.json or .npz), default: data/json/neighbours.json')
+    command.add_argument('--block-mb', type=int, default=64, help='memory of one block of similarities in MiB, default: 64')
+
+    append_command = commands.add_parser('append', parents=[common], help='append one new informant without a full rebuild')
+    append_command.add_argument('answers', help='answers of the informant, CSV file (item;answer rows) or JSON {item: answer}')
+    append_command.add_argument('--interview', help='ID of the new interview, default: the next number')
+    append_command.add_argument('--workers', type=int, help='number of processes rendering the changed diagrams')
+    append_command.add_argument('--no-cache', action='store_true', help=cache_help)
+    append_command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+    append_command.add_argument('--lazy', action='store_true', help='load the Sankey diagrams lazily from JSON files')
+
+    command = commands.add_parser('serve', parents=[common], help='serve JSON queries and the pages on a local HTTP server')
+    command.add_argument('--host', default='127.0.0.1', help='address to listen on, default: 127.0.0.1')
+    command.add_argument('--port', type=int, default=8765, help='port to listen on, default: 8765')
+    command.add_argument('--cache-size', type=int, default=256, help='query results kept in the LRU cache, default: 256')
+
+    build_command = commands.add_parser('build', parents=[common], help='run the changed steps of the pipeline')
+    build_command.add_argument('steps', nargs='*', help='only run these steps, e.g. step3 step4')
+    build_command.add_argument('--force', action='store_true', help='rebuild even if the inputs did not change')
+    build_command.add_argument('--no-cache', action='store_true', help=cache_help)
+    build_command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+    build_command.add_argument('--lazy', action='store_true', help='load the Sankey diagrams lazily from JSON files')
+    build_command.add_argument('--source', choices=['csv', 'xlsx'], default='csv',
+                               help='build from the CSV files (csv) or update them from the workbooks first (xlsx)')
+    build_command.add_argument('--force-xlsx', action='store_true',
+                               help='with --source xlsx, overwrite CSV files edited by hand with their workbooks')
+
+    batch_command = commands.add_parser('batch', parents=[common], help='build several datasets in parallel')
+    batch_command.add_argument('datasets', nargs='+', help='directories with the four CSV files (directly or in csv/)')
+    batch_command.add_argument('--output-dir', help='write the outputs to OUTPUT_DIR/<dataset directory name> instead of the datasets')
+    batch_command.add_argument('--workers', type=int, help='number of processes building the datasets (1 = no process pool)')
+    batch_command.add_argument('--assets', choices=ASSET_MODES, default='remote', help=assets_help)
+    batch_command.add_argument('--lazy', action='store_true', help='load the Sankey diagrams lazily from JSON files')
+
+    command = commands.add_parser('convert', parents=[common], help='convert a nodes and links file to another format')
+    command.add_argument('source', help='nodes and links file (.json, .columnar.json or .npz)')
+    command.add_argument('target', help='converted file')
+    command.add_argument('--format', choices=NODES_LINKS_FORMATS, help=formats_help)
+
+    args = parser.parse_args(argv)
+    instrument.configure(args)
+    cache = None if getattr(args, 'no_cache', False) else figure_cache
+    if args.command in CANONICAL_COMMANDS:
+        try:
+            categories = canonical_dataset()
+        except ValidationError as e:
+            parser.exit(1, f'{e}\n')
+
+    if args.command == 'xlsx':
+        try:
+            xlsx.ingest(xlsx_dir=args.xlsx_dir, force=args.force)
+        except xlsx.ExportConflict as e:
+            parser.exit(1, f'{e}\n')
+    elif args.command == 'validate':
+        try:
+            if args.check:
+                changed = validate_dataset()[1]
+            else:
+                changed = build_canonical(output_dir=args.output_dir)
+        except ValidationError as e:
+            parser.exit(1, f'{e}\n')
+        print(f'The CSV files are valid, {changed} cells normalised')
+    elif args.command == 'json':
+        csv_to_json(category_csv_files(categories), compact=args.compact)
+    elif args.command == 'nodes-links':
+        build_nodes_links(nodes_links_path=args.output, categories=categories, format=args.format)
+    elif args.command == 'network':
+        build_network_html(args.nodes_links, physics=args.physics, assets=args.assets, cache=cache)
+    elif args.command == 'subgraph':
+        if args.html is None and args.output is None:
+            subgraph_command.error('one of --html and --output is required')
+        build_subgraph(args.nodes_links, args.html, args.output, languages=args.language, types=args.type,
+                       interviews=args.interview, title=args.title, physics=args.physics, assets=args.assets, cache=cache)
+    elif args.command == 'views':
+        build_views(args.nodes_links, kinds=args.kinds, pages=not args.json_only, physics=args.physics,
+                    assets=args.assets, cache=cache)
+    elif args.command == 'sankey':
+        build_sankey_html(categories, workers=args.workers, assets=args.assets, lazy=args.lazy, cache=cache)
+    elif args.command == 'combinations':
+        build_combinations(categories, top=args.top, min_count=args.min_count, workers=args.workers, assets=args.assets,
+                           cache=cache)
+    elif args.command == 'statistics':
+        build_statistics(categories, output_dir=args.output_dir)
+    elif args.command == 'similarity':
+        build_neighbours(neighbours_path=args.output, k=args.k, metric=args.metric, block_bytes=args.block_mb * 2**20)
+    elif args.command == 'append':
+        try:
+            interview = delta.append_informant(delta.read_answers(args.answers), args.interview, workers=args.workers,
+                                               assets=args.assets, lazy=args.lazy, cache=cache)
+        except ValueError as e:
+            append_command.error(str(e))
+        print(f'Appended interview {interview}')
+    elif args.command == 'serve':
+        try:
+            server.serve(args.host, args.port, args.cache_size)
+        except FileNotFoundError as e:
+            parser.exit(1, f'{e}\n')
+    elif args.command == 'convert':
+        convert_nodes_links(args.source, args.target, args.format)
+    elif args.command == 'batch':
+        try:
+            results = batch.build_datasets(args.datasets, args.output_dir, workers=args.workers,
+                                           assets=args.assets, lazy=args.lazy)
+        except ValueError as e:
+            batch_command.error(str(e))
+        failed = [result for result in results if not result['ok']]
+        if failed:
+            parser.exit(1, f'{len(failed)} of {len(results)} datasets failed\n')
+    else:
+        unknown = set(args.steps) - {stage.name for stage in pipeline.create_stages(source=args.source)}
+        if unknown:
+            build_command.error('unknown step(s): ' + ', '.join(sorted(unknown)))
+        try:
+            pipeline.build(args.steps, force=args.force, assets=args.assets, lazy=args.lazy, cache=cache,
+                           source=args.source, force_xlsx=args.force_xlsx)
+        except (ValidationError, xlsx.ExportConflict) as e:
+            parser.exit(1, f'{e}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+'''
+Offline output mode for network.html and sankey.html.
+The pages load plotly.js, Bootstrap, vis-network and tom-select from CDNs (assets='remote'). With
+assets='local' these resources are replaced by pinned copies written to lib/ next to the page, with
+assets='inline' they are embedded into the page itself. In both offline modes the page is minified and
+precompressed .gz and .br siblings are written (the brotli package is required). An offline page must not
+load anything remotely, so a missing pinned copy is an error.
+'''
+
+import filecmp
+import gzip
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ASSET_MODES = ['remote', 'local', 'inline']
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+
+PLOTLY_URL = 'https://cdn.plot.ly/plotly-latest.min.js'
+
+# URLs used by the pages and by the pyvis template -> vendored copy, relative to data/py/lib
+VENDORED = {
+    'lib/bindings/utils.js': 'bindings/utils.js',
+    'lib/tom-select/tom-select.css': 'tom-select/tom-select.css',
+    'lib/tom-select/tom-select.complete.min.js': 'tom-select/tom-select.complete.min.js',
+    'https://cdnjs.cloudflare.com/ajax/libs/tom-select/2.0.0-rc.4/css/tom-select.min.css': 'tom-select/tom-select.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/tom-select/2.0.0-rc.4/js/tom-select.complete.js': 'tom-select/tom-select.complete.min.js',
+    'https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/dist/vis-network.min.css': 'vis-9.1.2/vis-network.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js': 'vis-9.1.2/vis-network.min.js',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css': 'bootstrap-5.3.3/bootstrap.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js': 'bootstrap-5.3.3/bootstrap.bundle.min.js',
+}
+
+# The pyvis template loads its own Bootstrap 5.0 beta, which duplicates the Bootstrap of the page.
+DROPPED = [
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/css/bootstrap.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/js/bootstrap.bundle.min.js',
+]
+
+TAG_PATTERN = re.compile(
+    r'<script\b[^>]*?\bsrc="(?P<script>[^"]+)"[^>]*>\s*</script>'
+    r'|<link\b[^>]*?\bhref="(?P<style>[^"]+)"[^>]*>'
+)
+
+
+def asset_files():
+    '''Return a dict URL -> (absolute path of the pinned copy, path of the copy below lib/).'''
+    files = {url: (os.path.join(VENDOR_DIR, path), path) for url, path in VENDORED.items()}
+    # plotly.js is pinned to the version bundled with the installed plotly package.
+    try:
+        import plotly
+        from plotly.offline import get_plotlyjs_version
+    except ImportError:
+        pass
+    else:
+        path = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+        files[PLOTLY_URL] = (path, f'plotly-{get_plotlyjs_version()}/plotly.min.js')
+    return files
+
+
+def require_brotli():
+    if brotli is None:
+        raise ImportError('the offline asset modes write .br files and need the brotli package (pip install brotli)')
+
+
+def minify_html(html):
+    '''Strip the indentation and blank lines of a page (the line breaks are kept for inline scripts).'''
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def replace_assets(html, mode, page_dir, drop=()):
+    '''
+    Replace the script and stylesheet tags of known remote resources by pinned local copies.
+    mode: 'local' copies the files to page_dir/lib and references them, 'inline' embeds them
+    drop: URLs whose tags are removed, e.g. resources the page does not use
+    '''
+    files = asset_files()
+
+    def replace(match):
+        url = match.group('script') or match.group('style')
+        if url in drop or url in DROPPED:
+            return ''
+        if url not in files:
+            return match.group(0)
+        path, name = files[url]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{path} is missing, the offline page would still load {url}')
+        is_script = match.group('script') is not None
+
+        if mode == 'inline':
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+            if is_script:
+                return '<script>' + content.replace('</script', '<\\/script') + '</script>'
+            return '<style>' + content + '</style>'
+
+        relative = 'lib/' + name
+        target = os.path.join(page_dir, 'lib', *name.split('/'))
+        # Copy and compress a file only once, several pages share the same copy.
+        if not os.path.exists(target) or not filecmp.cmp(path, target, shallow=False):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(path, target)
+            write_compressed(target)
+        if is_script:
+            return f'<script src="{relative}"></script>'
+        return f'<link rel="stylesheet" href="{relative}">'
+
+    return TAG_PATTERN.sub(replace, html)
+
+
+def write_compressed(path):
+    '''Write precompressed .gz and .br siblings of a file.'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    require_brotli()
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data))
+
+
+def write_page(html_path, html, mode='remote', drop=()):
+    '''Write a page, in the offline modes minified, with pinned assets and precompressed siblings.'''
+    if mode != 'remote':
+        require_brotli()
+        html = minify_html(html)
+        html = replace_assets(html, mode, os.path.dirname(os.path.abspath(html_path)), drop=drop)
+
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    if mode != 'remote':
+        write_compressed(html_path)
@@ -0,0 +1,119 @@
+'''
+Batch build of several datasets, e.g. one per language community or survey wave.
+A dataset is a directory with the four category CSV files (directly or in a csv/ subdirectory). Its JSON
+files, network.html and sankey.html are written to an output directory, by default the dataset directory.
+The CSV files of a dataset are validated and normalised first (languageweb/validate.py) and the steps read
+the canonical files written to the output directory, so an invalid dataset fails before anything is
+rendered. The datasets are built concurrently in a process pool. Every worker imports networkx, pyvis and
+plotly once and keeps the color tables, the parsed pyvis options and the compiled pyvis template for all
+the datasets it builds. A failing dataset does not stop the others, its error is part of the results.
+'''
+
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from languageweb import instrument
+from languageweb.categories import dataset_categories
+from languageweb.csvjson import category_csv_files, csv_to_json
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import build_nodes_links
+from languageweb.sankey import build_sankey_html
+from languageweb.validate import build_canonical
+
+
+# Libraries every worker imports before its first dataset, instead of during it
+WORKER_MODULES = ['networkx', 'plotly.graph_objects', 'pyvis.network']
+
+
+class Dataset:
+    '''
+    root: directory of the dataset
+    csv_dir: directory of the CSV files, root/csv if it exists, otherwise root
+    output_dir: directory of the outputs (JSON files in output_dir/json, the pages in output_dir)
+    categories: the category registry of the CSV files of the dataset
+    canonical_dir, canonical_categories: the validated, normalised CSV files and their categories
+    csv_files: the CSV files of step 1 (canonical)
+    '''
+
+    def __init__(self, root, output_dir=None):
+        self.root = os.path.abspath(root)
+        csv_dir = os.path.join(self.root, 'csv')
+        self.csv_dir = csv_dir if os.path.isdir(csv_dir) else self.root
+        self.output_dir = os.path.abspath(output_dir or self.root)
+        json_dir = os.path.join(self.output_dir, 'json')
+        self.json_all_data = os.path.join(json_dir, 'all_informants_interlocutors.json')
+        self.nodes_links = os.path.join(json_dir, 'nodes_links.json')
+        self.sankey_json_dir = os.path.join(json_dir, 'sankey')
+        self.sankey_flows = os.path.join(json_dir, 'sankey_flows.json')
+        self.network_html = os.path.join(self.output_dir, 'network.html')
+        self.sankey_html = os.path.join(self.output_dir, 'sankey.html')
+        self.categories = dataset_categories(self.csv_dir)
+        self.canonical_dir = os.path.join(self.output_dir, 'canonical')
+        self.canonical_categories = dataset_categories(self.canonical_dir)
+        self.csv_files = category_csv_files(self.canonical_categories)
+
+
+def build_dataset(dataset, assets='remote', lazy=False):
+    '''Build all outputs of one dataset and return a result dict (dataset, ok, seconds, outputs or error).'''
+    start = time.perf_counter()
+    try:
+        build_canonical(dataset.categories, dataset.canonical_dir)
+        os.makedirs(os.path.dirname(dataset.json_all_data), exist_ok=True)
+        csv_to_json(dataset.csv_files, dataset.json_all_data)
+        build_nodes_links(dataset.json_all_data, dataset.nodes_links, dataset.canonical_categories)
+        build_network_html(dataset.nodes_links, dataset.network_html, assets=assets)
+        # The datasets are already built in parallel, so the diagrams are rendered in the same process.
+        build_sankey_html(dataset.canonical_categories, dataset.sankey_html, dataset.sankey_json_dir, workers=1,
+                          assets=assets, lazy=lazy, flows_path=dataset.sankey_flows)
+    except Exception as e:
+        return {'dataset': dataset.root, 'ok': False, 'seconds': time.perf_counter() - start,
+                'error': f'{type(e).__name__}: {e}'}
+    return {'dataset': dataset.root, 'ok': True, 'seconds': time.perf_counter() - start,
+            'outputs': [dataset.nodes_links, dataset.network_html, dataset.sankey_html]}
+
+
+def init_worker(report=None):
+    '''Import the libraries once per worker process, before its first dataset.'''
+    if report is not None:
+        instrument.enable(**report)
+    for module in WORKER_MODULES:
+        importlib.import_module(module)
+
+
+def build_datasets(roots, output_dir=None, workers=None, assets='remote', lazy=False, log=print):
+    '''
+    Build the datasets in the directories roots, in a process pool unless workers is 1.
+    output_dir: if given, the outputs of a dataset are written to output_dir/<name of its directory>
+    Returns the result dicts of build_dataset in the order of roots.
+    '''
+    if output_dir is None:
+        datasets = [Dataset(root) for root in roots]
+    else:
+        names = [os.path.basename(os.path.abspath(root)) for root in roots]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError('datasets with the same directory name: ' + ', '.join(duplicates))
+        datasets = [Dataset(root, os.path.join(output_dir, name)) for root, name in zip(roots, names)]
+
+    def report(result):
+        if result['ok']:
+            log(f"{result['dataset']}: built in {result['seconds']:.1f} s")
+        else:
+            log(f"{result['dataset']}: failed, {result['error']}")
+
+    if workers == 1 or len(datasets) < 2:
+        results = []
+        for dataset in datasets:
+            results.append(build_dataset(dataset, assets, lazy))
+            report(results[-1])
+        return results
+
+    results = [None] * len(datasets)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(instrument.settings(),)) as pool:
+        futures = {pool.submit(build_dataset, dataset, assets, lazy): i for i, dataset in enumerate(datasets)}
+        for future in as_completed(futures):
+            results[futures[future]] = result = future.result()
+            report(result)
+    return results
@@ -0,0 +1,49 @@
+'''
+Registry of the survey categories.
+Every category is one CSV file whose first column holds the item labels (e.g. partner, at the bank,
+instagram) and whose other columns hold the answers of the informants. Adding a category to CATEGORIES
+is enough to get its nodes in the survey matrix and its own Sankey diagram.
+'''
+
+import os
+
+from languageweb import paths
+from languageweb.colors import item_color_nodes
+
+
+class Category:
+    '''
+    name: category name, also used as HTML anchor (e.g. interlocutors)
+    csv_path: CSV file with one row per item and one column per informant
+    label_column: header of the first column
+    node_type: type of the item nodes in the network
+    title: title of the Sankey diagram and its navigation link
+    network_color: color of the item nodes in the network
+    item_color: color of the item nodes in the Sankey diagram
+    '''
+
+    def __init__(self, name, csv_path, label_column, node_type, title, network_color, item_color=item_color_nodes):
+        self.name = name
+        self.csv_path = csv_path
+        self.label_column = label_column
+        self.node_type = node_type
+        self.title = title
+        self.network_color = network_color
+        self.item_color = item_color
+
+
+CATEGORIES = [
+    Category('interlocutors', paths.CSV_INTERLOCUTORS, 'interlocutor', 'interlocutor', 'Interlocutors', '#ffc107'),
+    Category('places', paths.CSV_PLACES, 'informant', 'place', 'Places', '#118ab2'),
+    Category('situations', paths.CSV_SITUATIONS, 'informant', 'situation', 'Situations', '#dc3545'),
+    Category('media', paths.CSV_MEDIA, 'informant', 'media', 'Media', '#6a040f'),
+]
+
+
+def dataset_categories(csv_dir, categories=CATEGORIES):
+    '''Return copies of the categories reading the CSV files of the same names in csv_dir, e.g. of another dataset.'''
+    return [
+        Category(category.name, os.path.join(csv_dir, os.path.basename(category.csv_path)), category.label_column,
+                 category.node_type, category.title, category.network_color, category.item_color)
+        for category in categories
+    ]
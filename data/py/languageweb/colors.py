@@ -0,0 +1,35 @@
+'''
+Colors of the languages and items in the Sankey diagrams and of the node types in the network.
+'''
+
+languages_colors_links = {
+    "No language given": "rgba(0, 104, 201, 0.8)",
+    "Dutch": "rgba(158, 115, 45, 0.8)",
+    "Turkish": "rgba(13, 59, 102, 0.8)",
+    "French": "rgba(238, 150, 75, 0.8)",
+    "German": "rgba(185, 117, 39, 0.8)",
+    "Şexbizinî": "rgba(249, 87, 56, 0.8)",
+    "Other language": "rgba(229, 183, 16, 0.8)",
+    "Kurmanji": "rgba(102, 17, 0, 0.8)",
+}
+
+languages_colors_nodes = {
+    "No language given": "rgba(0, 104, 201, 1.0)",
+    "Dutch": "rgba(158, 115, 45, 1.0)",
+    "Turkish": "rgba(13, 59, 102, 1.0)",
+    "French": "rgba(238, 150, 75, 1.0)",
+    "German": "rgba(185, 117, 39, 1.0)",
+    "Şexbizinî": "rgba(249, 87, 56, 1.0)",
+    "Other language": "rgba(229, 183, 16, 1.0)",
+    "Kurmanji": "rgba(102, 17, 0, 1.0)",
+}
+
+# Colors of the language combinations (and of the grouped rare ones) in the combination diagrams
+combination_color_nodes = "rgba(120, 120, 120, 1.0)"
+combination_color_links = "rgba(120, 120, 120, 0.6)"
+
+# Default color of the item nodes (interlocutors, places, situations, media)
+item_color_nodes = "rgba(216, 198, 151, 1.0)"
+
+# Color of the language nodes in the network, the item nodes are colored by category
+language_color_network = "#fd7e14"
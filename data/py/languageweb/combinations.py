@@ -0,0 +1,162 @@
+'''
+Language combinations (multilingual repertoires): which languages an informant uses together for an item.
+The network and the Sankey diagrams split an answer like "Kurmanji, Şexbizinî, Turkish" into one link per
+language. Here the answer stays one unit: it is the language bitmask of the survey matrix
+(languageweb/survey.py), a small integer, so counting the combinations of an item is counting equal
+integers, done for all items and categories in one pass. The frequent combinations of a category become
+the nodes of a Sankey diagram (combination -> item), the rare ones are grouped into one node.
+Output: data/json/combinations.json, combinations.html
+'''
+
+import json
+import os
+from collections import Counter
+
+from languageweb import instrument, paths
+from languageweb.colors import (
+    combination_color_links,
+    combination_color_nodes,
+    languages_colors_links,
+    languages_colors_nodes,
+)
+from languageweb.figcache import figure_cache
+from languageweb.sankey import render_figures, write_html
+from languageweb.stats import share
+from languageweb.survey import load_survey
+from languageweb.validate import canonical_dataset
+
+OTHER_COMBINATIONS = 'Other combinations'
+
+
+def combination_counts(survey):
+    '''
+    Count the combinations in one pass over the answers. Returns the counts per item (list of Counters
+    mask -> informants) and per category (dict category name -> Counter mask -> answers).
+    '''
+    item_counts = []
+    category_counts = {}
+    for item, masks in enumerate(survey.answers):
+        counts = Counter(masks)
+        # 0 is no answer
+        counts.pop(0, None)
+        item_counts.append(counts)
+        name = survey.item_categories[item]
+        if name is not None:
+            category_counts.setdefault(name, Counter()).update(counts)
+    return item_counts, category_counts
+
+
+def combination_languages(survey, mask):
+    return [survey.languages[lang] for lang in survey.mask_languages(mask)]
+
+
+def combination_label(survey, mask):
+    '''Return the name of a combination, e.g. Kurmanji + Turkish.'''
+    return ' + '.join(combination_languages(survey, mask))
+
+
+def frequent(counts, top=None, min_count=1):
+    '''Return the masks of the most frequent combinations (at most top, at least min_count answers each).'''
+    masks = [mask for mask, count in sorted(counts.items(), key=lambda entry: (-entry[1], entry[0])) if count >= min_count]
+    return masks if top is None else masks[:top]
+
+
+def combinations_index(survey, item_counts, category_counts):
+    '''Return all combinations per item and per category with their counts and shares, most frequent first.'''
+
+    def entries(counts):
+        total = sum(counts.values())
+        return [
+            {'languages': combination_languages(survey, mask), 'count': counts[mask], 'share': share(counts[mask], total)}
+            for mask in frequent(counts)
+        ]
+
+    return {
+        'languages': survey.languages,
+        'items': {label: entries(item_counts[item]) for item, label in enumerate(survey.items)},
+        'categories': {name: entries(counts) for name, counts in category_counts.items()},
+    }
+
+
+def combination_flows(survey, category, item_counts, category_counts, top=10, min_count=1):
+    '''
+    Return the Sankey flows (combination -> item) of a category as in languageweb/flows.py, with the
+    node and link colors and the title of the diagram. The top most frequent combinations of the
+    category are nodes of their own, all others are grouped into the node Other combinations.
+    '''
+    items = survey.category_items(category.name)
+    kept = frequent(category_counts.get(category.name, {}), top, min_count)
+    other = any(mask not in kept for mask in category_counts.get(category.name, {}))
+
+    def colors(mask, table, default):
+        languages = survey.mask_languages(mask)
+        return table.get(survey.languages[languages[0]], default) if len(languages) == 1 else default
+
+    labels = [combination_label(survey, mask) for mask in kept] + ([OTHER_COMBINATIONS] if other else [])
+    flows = {
+        'label': labels + [survey.items[item] for item in items],
+        'source': [],
+        'target': [],
+        'value': [],
+        'link_language': [],
+        'node_color': [colors(mask, languages_colors_nodes, combination_color_nodes) for mask in kept]
+        + ([combination_color_nodes] if other else []) + [category.item_color] * len(items),
+        'link_color': [],
+        'title': f'{category.title}: language combinations',
+    }
+    node = {mask: i for i, mask in enumerate(kept)}
+    for i, item in enumerate(items):
+        rest = 0
+        for mask, count in item_counts[item].items():
+            if mask not in node:
+                rest += count
+        for mask in kept:
+            count = item_counts[item].get(mask)
+            if count:
+                flows['source'].append(node[mask])
+                flows['target'].append(len(labels) + i)
+                flows['value'].append(count)
+                flows['link_language'].append(labels[node[mask]])
+                flows['link_color'].append(colors(mask, languages_colors_links, combination_color_links))
+        if rest:
+            flows['source'].append(len(kept))
+            flows['target'].append(len(labels) + i)
+            flows['value'].append(rest)
+            flows['link_language'].append(OTHER_COMBINATIONS)
+            flows['link_color'].append(combination_color_links)
+    return flows
+
+
+def build_combinations(categories=None, html_path=paths.HTML_COMBINATIONS, json_path=paths.JSON_COMBINATIONS,
+                       top=10, min_count=1, workers=None, assets='remote', cache=figure_cache):
+    '''
+    Count the language combinations, write them to json_path and write the page of the combination
+    diagrams (top: number of combinations per category shown as nodes of their own).
+    categories: by default those of the validated canonical dataset
+    '''
+    if categories is None:
+        categories = canonical_dataset()
+    with instrument.stage('combinations', 'count') as counts:
+        survey = load_survey(categories)
+        item_counts, category_counts = combination_counts(survey)
+        counts.update(
+            answers=sum(sum(item.values()) for item in item_counts),
+            combinations=len(set().union(*item_counts)),
+        )
+
+    with instrument.stage('combinations', 'write_json', outputs=[json_path]):
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(combinations_index(survey, item_counts, category_counts), f, ensure_ascii=False,
+                      separators=(',', ':'))
+
+    flows = {
+        category.name: combination_flows(survey, category, item_counts, category_counts, top, min_count)
+        for category in categories
+    }
+    with instrument.stage('combinations', 'render') as counts:
+        figures = render_figures(categories, flows, workers=workers, cache=cache)
+        counts['figures'] = len(figures)
+
+    with instrument.stage('combinations', 'write_html', outputs=[html_path]):
+        write_html(html_path, categories, figures_html=figures, assets=assets, title='Language combinations')
@@ -0,0 +1,72 @@
+'''
+Conversion of the category CSV files to a single JSON file (all_informants_interlocutors.json).
+The rows are streamed: every CSV row is read, encoded and written before the next one is read, so the
+memory use is bounded by the widest row rather than by the whole survey.
+'''
+
+import csv
+import json
+
+from languageweb import instrument, paths
+from languageweb.categories import CATEGORIES
+from languageweb.validate import canonical_dataset
+
+# Order of the categories in the JSON file (as written by the original step 1), other categories follow
+# in the order of the registry.
+JSON_ORDER = ['media', 'places', 'situations', 'interlocutors']
+
+
+def category_csv_files(categories=CATEGORIES):
+    '''Return the (CSV file, label column) pairs of the categories in the order of the JSON file.'''
+    ordered = sorted(categories, key=lambda c: JSON_ORDER.index(c.name) if c.name in JSON_ORDER else len(JSON_ORDER))
+    return [(category.csv_path, category.label_column) for category in ordered]
+
+
+def read_rows(csv_files):
+    '''Yield (label, row) pairs from the (CSV file, label column) pairs, one row at a time.'''
+    for csv_path, label_column in csv_files:
+        with open(csv_path, encoding='utf-8-sig') as csvf:
+            csvReader = csv.DictReader(csvf, delimiter=';')
+            for rows in csvReader:
+                yield rows[label_column], rows
+
+
+def write_json(rows, jsonf, indent=4):
+    '''
+    Write (key, value) pairs as one JSON object, encoding each value incrementally.
+    With indent=4 the output is identical to json.dumps(dict(rows), ensure_ascii=False, indent=4);
+    with indent=None it is written without any whitespace. Return the number of pairs written.
+    '''
+    if indent is None:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        newline = ''
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+        newline = '\n' + ' ' * indent
+
+    jsonf.write('{')
+    empty = True
+    count = 0
+    for key, value in rows:
+        jsonf.write(newline if empty else ',' + newline)
+        jsonf.write(encoder.encode(key) + encoder.key_separator)
+        # Nested lines need one more level of indentation, JSON strings never contain raw newlines.
+        for chunk in encoder.iterencode(value):
+            jsonf.write(chunk.replace('\n', newline) if newline else chunk)
+        empty = False
+        count += 1
+    jsonf.write('}' if empty else newline[:1] + '}')
+    return count
+
+
+def csv_to_json(csv_files=None, json_path=paths.JSON_ALL_DATA, compact=False):
+    '''
+    Stream the rows of the CSV files, keyed by their label, into one JSON file.
+    csv_files: (CSV file, label column) pairs, by default those of the validated canonical dataset
+    '''
+    if csv_files is None:
+        csv_files = category_csv_files(canonical_dataset())
+    with instrument.stage('step1', 'csv_to_json', outputs=[json_path]) as counts:
+        with open(json_path, 'w', encoding='utf-8') as jsonf:
+            counts['rows'] = write_json(read_rows(csv_files), jsonf, indent=None if compact else 4)
+
@@ -0,0 +1,122 @@
+'''
+Minimal incremental build engine.
+The pipeline is modelled as a dependency graph of stages. Every stage has a fingerprint, a content hash
+of its input files and parameters, and is skipped when the fingerprint equals the one recorded after
+its last successful run and its outputs are still the ones it wrote (not deleted, and not overwritten e.g.
+by a step script run on its own).
+'''
+
+import hashlib
+import json
+import os
+from graphlib import TopologicalSorter
+
+
+class Stage:
+    '''
+    A single build step.
+    name: unique stage name
+    run: callable without arguments doing the actual work
+    inputs: files whose content the outputs depend on
+    outputs: files the stage writes
+    params: JSON-serialisable options that influence the outputs (colors, layout options, ...)
+    deps: names of the stages that have to run first
+    '''
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, deps=()):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params
+        self.deps = list(deps)
+
+
+def file_digest(path):
+    '''Return the SHA-256 hex digest of a file's content, or None if it does not exist.'''
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(stage):
+    '''Hash the stage name, the content of all its inputs and its parameters.'''
+    digest = hashlib.sha256(stage.name.encode('utf-8'))
+    for path in stage.inputs:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(str(file_digest(path)).encode('utf-8'))
+    digest.update(json.dumps(stage.params, sort_keys=True, ensure_ascii=False, default=repr).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def output_digests(stage):
+    '''Return the content hashes of the outputs of a stage (None for missing files).'''
+    return [file_digest(path) for path in stage.outputs]
+
+
+def stage_state(stage, current):
+    return {'fingerprint': current, 'outputs': output_digests(stage)}
+
+
+def load_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state_path, state):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
+
+
+def run(stages, state_path, force=False, only=None, log=print):
+    '''
+    Run the stages in dependency order and skip the up-to-date ones.
+    force: run every selected stage regardless of its fingerprint
+    only: names of the stages to consider (their dependencies are not added automatically)
+    Returns a dict stage name -> 'built' or 'skipped'.
+    '''
+    by_name = {stage.name: stage for stage in stages}
+    order = TopologicalSorter({stage.name: stage.deps for stage in stages}).static_order()
+    state = load_state(state_path)
+    results = {}
+
+    for name in order:
+        stage = by_name[name]
+        if only and name not in only:
+            continue
+        # The fingerprint is taken after the dependencies ran, so it sees their fresh outputs.
+        current = fingerprint(stage)
+        if not force and state.get(name) == stage_state(stage, current):
+            results[name] = 'skipped'
+            log(f'{name}: up to date')
+            continue
+        log(f'{name}: building')
+        stage.run()
+        state[name] = stage_state(stage, current)
+        save_state(state_path, state)
+        results[name] = 'built'
+
+    return results
+
+
+def stale(stages, state_path, names):
+    '''Return the names of the stages names that are not up to date, in the order of stages.'''
+    state = load_state(state_path)
+    return [stage.name for stage in stages
+            if stage.name in names and state.get(stage.name) != stage_state(stage, fingerprint(stage))]
+
+
+def record(stages, state_path, names):
+    '''Record the stages names as up to date, e.g. after their outputs were updated by other means.'''
+    state = load_state(state_path)
+    for stage in stages:
+        if stage.name in names:
+            state[stage.name] = stage_state(stage, fingerprint(stage))
+    save_state(state_path, state)
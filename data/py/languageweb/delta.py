@@ -0,0 +1,323 @@
+'''
+Delta mode: append the answers of one new informant (one new interview) without re-running the pipeline.
+The new interview adds one column to every CSV file. Instead of converting, aggregating and rendering the
+whole survey again, the answers are validated and normalised like the CSV files (languageweb/validate.py),
+the column is appended to the CSV files and the canonical dataset, and the derived data is patched in place:
+the answers are added to all_informants_interlocutors.json, the links of the informant (and any new
+language node) are inserted into nodes_links.json, the counts of the Sankey flows and of the statistics
+index are incremented for the answered items only. The patched files are identical to the ones a full
+rebuild writes, so the incremental build (languageweb/pipeline.py) records them as up to date.
+The pages are then written from the patched data; the Sankey diagrams of categories whose flows did not
+change are taken from the figure cache.
+Input: the answers of the new informant, a CSV file with item;answer rows or a JSON object {item: answer}
+Output: the CSV files, the JSON files, the statistics, network.html and sankey.html
+'''
+
+import csv
+import json
+import os
+
+from languageweb import dag, instrument, paths, pipeline
+from languageweb.categories import CATEGORIES, dataset_categories
+from languageweb.csvjson import write_json
+from languageweb.figcache import figure_cache
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import node_data, read_nodes_links, write_nodes_links
+from languageweb.sankey import read_flows, write_flows, write_sankey
+from languageweb.stats import share, write_statistics
+from languageweb.survey import split_answer
+from languageweb.validate import Normaliser
+
+# Stages of the incremental build whose outputs are patched here
+DELTA_STAGES = ['validate', 'step1', 'step2', 'step3', 'step4', 'statistics']
+
+
+def read_answers(path):
+    '''Read the answers of an informant: a JSON object {item: answer} or a CSV file with item;answer rows.'''
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    answers = {}
+    with open(path, encoding='utf-8-sig') as csvf:
+        for row in csv.reader(csvf, delimiter=';'):
+            if len(row) >= 2 and row[0] != 'item':
+                answers[row[0]] = row[1]
+    return answers
+
+
+def new_answers(items, answers):
+    '''Return (item position, languages) of the items the informant answered, in the order of items.'''
+    answered = []
+    for position, label in enumerate(items):
+        languages = list(dict.fromkeys(split_answer(answers.get(label) or '')))
+        if languages:
+            answered.append((position, languages))
+    return answered
+
+
+def language_order(first_keys, answered):
+    '''
+    Return the languages in the order a full rebuild interns them: by the first item using them, within
+    an item the known languages first (the new informant is the last column) and new ones as answered.
+    first_keys: known language -> (position of its first item, rank among the languages of that item)
+    answered: see new_answers
+    '''
+    keys = {language: (item, 0, rank) for language, (item, rank) in first_keys.items()}
+    for item, languages in answered:
+        for rank, language in enumerate(languages):
+            key = (item, 1, rank)
+            if language not in keys or key < keys[language]:
+                keys[language] = key
+    return sorted(keys, key=keys.get)
+
+
+def ordered(values, rank):
+    '''Return the dict language -> values sorted by the rank of the languages.'''
+    return {language: values[language] for language in sorted(values, key=rank.get)}
+
+
+######################################################################################################################
+
+def append_csv_columns(categories, interview, answers):
+    '''Append the column of the interview to the CSV file of every category (answers by normalised label).'''
+    for category in categories:
+        with open(category.csv_path, encoding='utf-8-sig', newline='') as csvf:
+            rows = list(csv.reader(csvf, delimiter=';'))
+        rows[0].append(interview)
+        for row in rows[1:]:
+            if row:
+                row.append(answers.get(' '.join(row[0].split()), ''))
+        with open(category.csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+            csv.writer(csvf, delimiter=';').writerows(rows)
+
+
+def append_json(json_path, interview, answers, compact=False):
+    '''Add the answers of the interview to every row of the JSON file of step 1; return the item labels.'''
+    with open(json_path, encoding='utf-8') as jsonf:
+        data = json.load(jsonf)
+    for label, row in data.items():
+        row[interview] = answers.get(label, '')
+    with open(json_path, 'w', encoding='utf-8') as jsonf:
+        write_json(data.items(), jsonf, indent=None if compact else 4)
+    return list(data)
+
+
+def append_links(network_data, items, interview, answers):
+    '''
+    Insert the links of the interview into the nodes and links (items: item labels in the order of the
+    JSON file of step 2) and add nodes for new languages. Return the number of new links.
+    '''
+    position = {label: i for i, label in enumerate(items)}
+    languages = [node['id'] for node in network_data['nodes'] if node['type'] == 'language']
+    language_rank = {language: i for i, language in enumerate(languages)}
+
+    # The links are grouped by item (source) and within an item by interview.
+    groups = {}
+    first_keys = {}
+    for link in network_data['links']:
+        groups.setdefault(link['source'], []).append(link)
+        first_keys.setdefault(link['target'], (position[link['source']], language_rank[link['target']]))
+
+    answered = new_answers(items, answers)
+    order = language_order(first_keys, answered)
+    rank = {language: i for i, language in enumerate(order)}
+    # A new informant can move a known language ahead, which reorders the links of each interview.
+    reorder = order[:len(languages)] != languages
+
+    links = []
+    new_links = {items[item]: languages for item, languages in answered}
+    count = 0
+    for label in items:
+        group = groups.pop(label, [])
+        if reorder:
+            start = 0
+            for i in range(1, len(group) + 1):
+                if i == len(group) or group[i]['interview'] != group[start]['interview']:
+                    group[start:i] = sorted(group[start:i], key=lambda link: rank[link['target']])
+                    start = i
+        links.extend(group)
+        for language in sorted(new_links.get(label, ()), key=rank.get):
+            links.append({'interview': interview, 'source': label, 'target': language})
+            count += 1
+    for group in groups.values():
+        links.extend(group)
+
+    nodes = {node['id']: node for node in network_data['nodes']}
+    network_data['nodes'] = [node for node in network_data['nodes'] if node['type'] != 'language'] + [
+        nodes.get(language) or node_data(language, {}) for language in order
+    ]
+    network_data['links'] = links
+    return count
+
+
+def append_flows(flows, categories, category_items, interview_answers, order):
+    '''
+    Add the answers to the Sankey flows of the categories (languages in the order of the survey matrix)
+    and return the names of the categories whose flows changed.
+    '''
+    rank = {language: i for i, language in enumerate(order)}
+    changed = []
+    for category in categories:
+        items = category_items[category.name]
+        old = flows[category.name]
+        n_used = len(old['label']) - len(items)
+        values = {}
+        for source, target, value in zip(old['source'], old['target'], old['value']):
+            values[(target - n_used, old['label'][source])] = value
+        for i, label in enumerate(items):
+            for language in dict.fromkeys(split_answer(interview_answers.get(label) or '')):
+                values[(i, language)] = values.get((i, language), 0) + 1
+
+        # Same node and link order as languageweb/flows.py:category_flows
+        used = sorted({language for _, language in values}, key=rank.get)
+        language_node = {language: i for i, language in enumerate(used)}
+        new = {'label': used + items, 'source': [], 'target': [], 'value': [], 'link_language': []}
+        for i in range(len(items)):
+            for language in used:
+                value = values.get((i, language))
+                if value:
+                    new['source'].append(language_node[language])
+                    new['target'].append(len(used) + i)
+                    new['value'].append(value)
+                    new['link_language'].append(language)
+        if new != old:
+            flows[category.name] = new
+            changed.append(category.name)
+    return changed
+
+
+def append_statistics(index, category_items, interview, answers):
+    '''Add the informant to the statistics index of languageweb/stats.py; return the language order.'''
+    items = list(index['language_item'])
+    position = {label: i for i, label in enumerate(items)}
+    language_rank = {language: i for i, language in enumerate(index['languages'])}
+    first_keys = {}
+    for label, languages in index['language_item'].items():
+        for language in languages:
+            first_keys.setdefault(language, (position[label], language_rank[language]))
+
+    answered = new_answers(items, answers)
+    order = language_order(first_keys, answered)
+    rank = {language: i for i, language in enumerate(order)}
+    index['informants'] += 1
+    index['languages'] = order
+
+    informant_counts = {}
+    for item, languages in answered:
+        label = items[item]
+        index['answered'][label] += 1
+        values = index['language_item'][label]
+        for language in languages:
+            values.setdefault(language, {'count': 0, 'share': 0.0})['count'] += 1
+            informant_counts[language] = informant_counts.get(language, 0) + 1
+        for counts in values.values():
+            counts['share'] = share(counts['count'], index['answered'][label])
+    for label, values in index['language_item'].items():
+        index['language_item'][label] = ordered(values, rank)
+
+    index['informant_language'][interview] = ordered({
+        language: {'count': count, 'share': share(count, len(answered))}
+        for language, count in informant_counts.items()
+    }, rank)
+    for informant, values in index['informant_language'].items():
+        index['informant_language'][informant] = ordered(values, rank)
+
+    answered_labels = {items[item]: languages for item, languages in answered}
+    for name, values in index['category_language'].items():
+        answers_count = {}
+        for label in category_items.get(name, ()):
+            for language in answered_labels.get(label, ()):
+                answers_count[language] = answers_count.get(language, 0) + 1
+        for language, count in answers_count.items():
+            counts = values.setdefault(language, {'informants': 0, 'share': 0.0, 'answers': 0, 'answer_share': 0.0})
+            counts['informants'] += 1
+            counts['answers'] += count
+        # The shares of all languages change with the number of informants and answers.
+        total = sum(counts['answers'] for counts in values.values())
+        for counts in values.values():
+            counts['share'] = share(counts['informants'], index['informants'])
+            counts['answer_share'] = share(counts['answers'], total)
+        index['category_language'][name] = ordered(values, rank)
+    return order
+
+
+######################################################################################################################
+
+def next_interview(headers):
+    '''Return the ID following the largest numeric interview ID of the CSV headers.'''
+    numbers = [int(interview) for header in headers for interview in header[1:] if interview.isdigit()]
+    return str(max(numbers, default=0) + 1)
+
+
+def append_informant(answers, interview=None, categories=CATEGORIES, workers=None, assets='remote', lazy=False,
+                     cache=figure_cache):
+    '''
+    Append the answers (dict item label -> answer, e.g. "Kurmanji, Turkish") of a new informant to the
+    survey and update all outputs of the pipeline. interview: ID of the new interview, by default the
+    next number. Stages of the incremental build that are not up to date are built first. Returns the
+    interview ID.
+    '''
+    # The outputs are patched and then recorded as up to date, so pending changes (e.g. CSV files edited
+    # since the last build) have to be built first or they would be lost.
+    stages = pipeline.create_stages(assets=assets, lazy=lazy, cache=cache)
+    if dag.stale(stages, pipeline.state_path, DELTA_STAGES):
+        pipeline.build(DELTA_STAGES, assets=assets, lazy=lazy, cache=cache)
+
+    canonical = dataset_categories(paths.CANONICAL_CSV_DIR, categories)
+    headers = []
+    category_items = {}
+    for category in canonical:
+        with open(category.csv_path, encoding='utf-8-sig') as csvf:
+            rows = [row for row in csv.reader(csvf, delimiter=';') if row]
+        headers.append(rows[0])
+        category_items[category.name] = [row[0] for row in rows[1:]]
+
+    interview = str(interview) if interview is not None else next_interview(headers)
+    if any(interview in header[1:] for header in headers):
+        raise ValueError(f'interview {interview} is already in the survey')
+    known = {label for items in category_items.values() for label in items}
+    answers = {' '.join(label.split()): value for label, value in answers.items()}
+    unknown = [label for label in answers if label not in known]
+    if unknown:
+        raise ValueError('unknown items: ' + ', '.join(unknown))
+    normaliser = Normaliser()
+    normalised = {}
+    for label, value in answers.items():
+        normalised[label], languages = normaliser.answer(value)
+        if languages:
+            raise ValueError(f'unknown language(s) for {label}: ' + ', '.join(languages))
+    raw_answers, answers = answers, normalised
+
+    with instrument.stage('delta', 'csv') as counts:
+        append_csv_columns(categories, interview, raw_answers)
+        append_csv_columns(canonical, interview, answers)
+        counts['files'] = len(categories) + len(canonical)
+
+    with instrument.stage('delta', 'json', outputs=[paths.JSON_ALL_DATA]) as counts:
+        items = append_json(paths.JSON_ALL_DATA, interview, answers)
+        counts['items'] = len(items)
+
+    with instrument.stage('delta', 'nodes_links', outputs=[paths.JSON_NODES_LINKS]) as counts:
+        network_data = read_nodes_links(paths.JSON_NODES_LINKS)
+        counts['links'] = append_links(network_data, items, interview, answers)
+        write_nodes_links(network_data, paths.JSON_NODES_LINKS)
+
+    statistics_path = os.path.join(paths.STATISTICS_DIR, 'statistics.json')
+    with instrument.stage('delta', 'statistics', outputs=[statistics_path]):
+        with open(statistics_path, encoding='utf-8') as f:
+            index = json.load(f)
+        order = append_statistics(index, category_items, interview, answers)
+        write_statistics(index, paths.STATISTICS_DIR)
+
+    with instrument.stage('delta', 'flows', outputs=[paths.JSON_SANKEY_FLOWS]) as counts:
+        flows = read_flows(paths.JSON_SANKEY_FLOWS)
+        changed = append_flows(flows, canonical, category_items, answers, order)
+        write_flows(paths.JSON_SANKEY_FLOWS, flows)
+        counts['changed'] = len(changed)
+
+    build_network_html(assets=assets, cache=cache)
+    write_sankey(canonical, flows, workers=workers, assets=assets, lazy=lazy, cache=cache)
+
+    # The patched outputs equal those of a full rebuild, so the incremental build does not redo them.
+    dag.record(stages, pipeline.state_path, DELTA_STAGES)
+    return interview
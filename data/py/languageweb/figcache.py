@@ -0,0 +1,96 @@
+'''
+On-disk cache of rendered figures (the Sankey fig.to_html/to_json fragments and the pyvis network HTML).
+A figure is stored under a key hashing everything it is rendered from: the input arrays, the color
+tables, the layout options, the library version and the source of the module rendering it. Edits to the page chrome (navbar, CSS links) then
+re-assemble the pages from cached figures instead of rendering them again. The cache is bounded in size
+and evicts the least recently used figures, the last use of a file is its modification time.
+Output: one file per figure in data/.cache/figures
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+from languageweb import paths
+
+
+def cache_key(*parts):
+    '''Return a SHA-256 hex digest of JSON-serialisable parts.'''
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=repr)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def source_token(path):
+    '''Return a hash of a source file, so that changes to the code rendering a figure invalidate its key.'''
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class FigureCache:
+    '''
+    directory: directory of the cached figures
+    max_bytes: total size above which the least recently used figures are removed
+    '''
+
+    def __init__(self, directory=paths.FIGURE_CACHE_DIR, max_bytes=64 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.txt')
+
+    def get(self, key):
+        '''Return the cached figure, or None if it is not cached.'''
+        path = self.path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            # Mark the figure as recently used.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return text
+
+    def put(self, key, text):
+        '''Store a figure and evict the least recently used ones if the cache is too large.'''
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first, so concurrent builds never read half a figure.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.txt'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_or_render(self, key, render):
+        '''Return the cached figure of key, rendering and storing it with render() on a miss.'''
+        text = self.get(key)
+        if text is None:
+            text = render()
+            self.put(key, text)
+        return text
+
+
+# Cache used by the steps unless they are given another one (or None, which disables caching)
+figure_cache = FigureCache()
@@ -0,0 +1,64 @@
+'''
+Aggregation of the Sankey flows (language -> item).
+The value matrix (number of informants per item and language) is computed for all categories in one
+pass over the informant bitsets of the survey matrix; the flows of a category are then read off the
+matrix as parallel source/target/value lists that can be passed to go.Sankey as they are.
+'''
+
+from array import array
+
+
+def value_matrix(survey):
+    '''
+    Return the flat item x language matrix of informant counts as an array,
+    the value of (item, language) is at index item * len(survey.languages) + language.
+    '''
+    n_languages = len(survey.languages)
+    matrix = array('l', [0]) * (len(survey.items) * n_languages)
+    for item, sets in enumerate(survey.informant_sets):
+        row = item * n_languages
+        for lang, bitset in sets.items():
+            matrix[row + lang] = bitset.bit_count()
+    return matrix
+
+
+def category_flows(survey, category, matrix=None):
+    '''
+    Return the flows of a category as a dict of lists:
+    label: node labels, first the languages used in the category, then the items
+    source, target: node indices (language -> item) of every link
+    value: number of informants of every link
+    link_language: language name of every link, e.g. for the link colors
+    '''
+    if matrix is None:
+        matrix = value_matrix(survey)
+    n_languages = len(survey.languages)
+    items = survey.category_items(category)
+
+    # Only the languages which are used for at least one item of the category become nodes.
+    used = [lang for lang in range(n_languages) if any(matrix[item * n_languages + lang] for item in items)]
+    language_node = {lang: i for i, lang in enumerate(used)}
+
+    flows = {
+        'label': [survey.languages[lang] for lang in used] + [survey.items[item] for item in items],
+        'source': [],
+        'target': [],
+        'value': [],
+        'link_language': [],
+    }
+    for i, item in enumerate(items):
+        row = item * n_languages
+        for lang in used:
+            value = matrix[row + lang]
+            if value:
+                flows['source'].append(language_node[lang])
+                flows['target'].append(len(used) + i)
+                flows['value'].append(value)
+                flows['link_language'].append(survey.languages[lang])
+    return flows
+
+
+def all_flows(survey, categories):
+    '''Return a dict category name -> flows, sharing one value matrix.'''
+    matrix = value_matrix(survey)
+    return {category.name: category_flows(survey, category.name, matrix) for category in categories}
@@ -0,0 +1,111 @@
+'''
+Opt-in instrumentation of the step scripts.
+The steps wrap their stages (e.g. reading the JSON file, nx/pyvis, fig.to_html, writing the output) in
+stage(). While the instrumentation is off this costs nothing; once enable() was called (--report in the
+step scripts and build.py) every stage appends one JSON line to the report with its wall time, counts
+(rows, nodes, links, ...) and bytes written, with --trace-memory its peak memory (tracemalloc) and with
+--profile the path of a cProfile dump of the stage.
+Output: build_report.jsonl next to the HTML pages (and <step>.<stage>.prof files in the same directory)
+'''
+
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from languageweb import paths
+
+# Settings of the current process, None while the instrumentation is off
+_report = None
+
+
+def enable(report_path=paths.JSONL_REPORT, profile=False, memory=False, run=None):
+    '''Turn the instrumentation on, all following stages are appended to report_path.'''
+    global _report
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    _report = {'path': report_path, 'profile': profile, 'memory': memory, 'run': run or uuid.uuid4().hex[:12]}
+
+
+def disable():
+    global _report
+    _report = None
+
+
+def enabled():
+    return _report is not None
+
+
+def settings():
+    '''Return the keyword arguments of enable() for the current settings (e.g. for worker processes), or None.'''
+    if _report is None:
+        return None
+    return {'report_path': _report['path'], 'profile': _report['profile'], 'memory': _report['memory'], 'run': _report['run']}
+
+
+def add_arguments(parser):
+    '''Add the instrumentation options to the argument parser of a script.'''
+    parser.add_argument('--report', nargs='?', const=paths.JSONL_REPORT, metavar='FILE',
+                        help='append per-stage timings, counts and sizes as JSON lines (default: build_report.jsonl)')
+    parser.add_argument('--profile', action='store_true', help='with --report, write a cProfile dump of every stage')
+    parser.add_argument('--trace-memory', action='store_true', help='with --report, record the peak memory of every stage')
+
+
+def configure(args):
+    '''Enable the instrumentation if the parsed arguments ask for it.'''
+    if args.report:
+        enable(args.report, profile=args.profile, memory=args.trace_memory)
+
+
+@contextmanager
+def stage(step, name, outputs=()):
+    '''
+    Measure a stage of a step. The yielded dict takes the counts of the stage, e.g. counts['links'] = 1234;
+    outputs are the files written by the stage, their sizes are reported as bytes.
+    '''
+    counts = {}
+    if _report is None:
+        yield counts
+        return
+
+    report = _report
+    tracing = report['memory'] and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif report['memory']:
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile() if report['profile'] else None
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield counts
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+
+        record = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'run': report['run'],
+            'step': step,
+            'stage': name,
+            'seconds': round(seconds, 6),
+            'counts': counts,
+            'bytes': sum(os.path.getsize(path) for path in outputs if os.path.exists(path)),
+        }
+        if report['memory']:
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+        if profiler is not None:
+            profile_path = os.path.join(os.path.dirname(os.path.abspath(report['path'])), f'{step}.{name}.prof')
+            profiler.dump_stats(profile_path)
+            record['profile'] = profile_path
+
+        with open(report['path'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
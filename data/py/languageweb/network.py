@@ -0,0 +1,43 @@
+'''
+Network model built from nodes_links.json.
+The links hold one entry per informant, item and language; aggregate_links collapses them into one
+weighted edge per (item, language) pair before the graph is handed to networkx/pyvis.
+'''
+
+
+def aggregate_links(links):
+    '''
+    Collapse the links into weighted edges, in the order of their first link. Every edge is a dict with
+    source, target, count (number of links), share (count / number of informants) and interviews (IDs).
+    '''
+    edges = {}
+    informants = set()
+    for link in links:
+        informants.add(link['interview'])
+        key = (link['source'], link['target'])
+        edge = edges.get(key)
+        if edge is None:
+            edge = edges[key] = {'source': link['source'], 'target': link['target'], 'count': 0, 'interviews': []}
+        edge['count'] += 1
+        edge['interviews'].append(link['interview'])
+
+    for edge in edges.values():
+        edge['share'] = edge['count'] / len(informants)
+    return list(edges.values())
+
+
+def edge_width(count, max_count, min_width=1, max_width=15):
+    '''Scale the count of an edge linearly to a line width.'''
+    return round(min_width + (max_width - min_width) * count / max_count, 1)
+
+
+def compute_layout(graph, seed=1, scale=2000, weight='weight'):
+    '''
+    Compute the node positions offline with the networkx spring (Fruchterman-Reingold) layout.
+    The seed makes the layout deterministic; heavier edges pull their nodes closer together.
+    Returns a dict node -> {'x': ..., 'y': ...} in vis-network pixel coordinates.
+    '''
+    import networkx as nx
+
+    positions = nx.spring_layout(graph, weight=weight, seed=seed, scale=scale)
+    return {node: {'x': round(float(x)), 'y': round(float(y))} for node, (x, y) in positions.items()}
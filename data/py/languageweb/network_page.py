@@ -0,0 +1,193 @@
+'''
+Network page (network.html) built from nodes_links.json with networkx and pyvis.
+By default the node positions are computed here (seeded spring layout) and the browser physics is
+disabled, so the page renders without a force simulation; physics=True keeps the former browser layout.
+networkx and pyvis are only imported when a page is built. The parsed options and the compiled pyvis
+template are cached, so a process building several pages (see languageweb/batch.py) prepares them once,
+and the layout and pyvis HTML are kept in the figure cache (languageweb/figcache.py), so changes to the
+page itself do not compute them again.
+'''
+
+import json
+from functools import lru_cache
+from importlib.metadata import version
+
+from languageweb import instrument, paths
+from languageweb.assets import PLOTLY_URL, write_page
+from languageweb.figcache import cache_key, figure_cache, source_token
+from languageweb.network import aggregate_links, compute_layout, edge_width
+from languageweb.nodes_links import read_nodes_links
+from languageweb.pages import render_page
+
+network_options = """
+const options = {
+  "nodes": {
+    "borderWidth": 3,
+    "borderWidthSelected": 80,
+    "color": {
+      "border": "#2B7CE9",
+      "background": "#D2E5FF",
+      "highlight": {
+        "border": "#2B7CE9",
+        "background": "#D2E5FF"
+      },
+      "hover": {
+        "border": "#2B7CE9",
+        "background": "#D2E5FF"
+      }
+    },
+    "font": {
+      "color": "#343434",
+      "size": 40
+    },
+    "size": 50,
+    "scaling": {
+      "enabled": false
+    }
+  },
+  "edges": {
+    "color": {
+      "inherit": "both"
+    },
+    "smooth": {
+      "enabled": true,
+      "type": "dynamic"
+    },
+    "width": 10
+  },
+  "physics": {
+    "enabled": true,
+    "barnesHut": {
+      "gravitationalConstant": -3000,
+      "centralGravity": 0.005,
+      "springLength": 500,
+      "springConstant": 0.01,
+      "damping": 0.8,
+      "avoidOverlap": 0.7
+    },
+    "maxVelocity": 1,
+    "minVelocity": 0,
+    "solver": "barnesHut",
+    "timestep": 0.001,
+    "stabilization": {
+      "enabled": true,
+      "fit": true
+    }
+  }
+}
+"""
+
+# Parameters of the offline spring layout, part of the cache key of the pyvis HTML
+layout_options = {'seed': 1, 'scale': 2000}
+
+
+@lru_cache(maxsize=None)
+def options_json(physics):
+    '''Return the vis-network options as JSON, without the browser physics unless physics is True.'''
+    options = json.loads(network_options[network_options.index('{'):])
+    if not physics:
+        options['physics']['enabled'] = False
+        # Dynamic smooth edges rely on the physics simulation.
+        options['edges']['smooth']['type'] = 'continuous'
+    return json.dumps(options)
+
+
+@lru_cache(maxsize=None)
+def template_env(template_dir, compact):
+    '''Return a jinja environment for the pyvis template, which compiles the template only once.'''
+    from jinja2 import Environment, FileSystemLoader
+
+    env = Environment(loader=FileSystemLoader(template_dir))
+    if compact:
+        # Write the embedded nodes, edges and options without whitespace.
+        env.policies['json.dumps_kwargs'] = {'sort_keys': True, 'separators': (',', ':')}
+    return env
+
+
+def network_key(nodes, links, physics, compact):
+    '''
+    Return the cache key of the pyvis HTML: a hash of the graph, the options, the library versions and the
+    source of this module.
+    '''
+    return cache_key('network', version('networkx'), version('pyvis'), source_token(__file__), nodes, links, physics,
+                     compact, options_json(physics), layout_options)
+
+
+def network_html(data, physics=False, compact=False, cache=figure_cache):
+    '''
+    Return the pyvis HTML of the network of the nodes and links in data (as in nodes_links.json).
+    compact: write the embedded nodes, edges and options without whitespace (the offline asset modes)
+    cache: figure cache of the layout and the pyvis HTML, None computes them in any case
+    '''
+    nodes = [(node['id'], {"color": node['color']}) for node in data['nodes']]
+    links = []
+
+    # Collapse the links into one weighted edge per informant/interlocutor and language.
+    # pyvis turns the 'weight' into the edge width, the tooltip lists the interviews of the edge.
+    with instrument.stage('step3', 'aggregate_links') as counts:
+        edges = aggregate_links(data['links'])
+        max_count = max((edge['count'] for edge in edges), default=1)
+        for edge in edges:
+            links.append((edge['source'], edge['target'], {
+                "weight": edge_width(edge['count'], max_count),
+                "title": f"{edge['source']} - {edge['target']}: {edge['count']} informants ({edge['share']:.0%}), "
+                         f"interviews {', '.join(edge['interviews'])}",
+            }))
+        counts['edges'] = len(edges)
+
+    key = network_key(nodes, links, physics, compact)
+    html = None if cache is None else cache.get(key)
+
+    if html is None:
+        import networkx as nx
+        from pyvis.network import Network
+
+        G = nx.Graph()
+        G.add_nodes_from(nodes)
+        G.add_edges_from(links)
+
+        # Compute the layout offline and pin the nodes, so the browser does not have to simulate it.
+        if not physics:
+            with instrument.stage('step3', 'layout') as counts:
+                nx.set_node_attributes(G, compute_layout(G, **layout_options))
+                counts['nodes'] = G.number_of_nodes()
+
+        # Create a pyvis network graph from the networkx graph.
+        with instrument.stage('step3', 'generate_html') as counts:
+            nt = Network(height='550px', width='100%', bgcolor='#ffffff', font_color='black', select_menu=True, cdn_resources='remote')
+
+            nt.set_options(options_json(physics))
+            nt.from_nx(G)
+
+            nt.templateEnv = template_env(nt.template_dir, compact)
+            html = nt.generate_html()
+            if compact:
+                html = html.replace(json.dumps(nt.options), json.dumps(nt.options, separators=(',', ':')))
+            counts['characters'] = len(html)
+
+        if cache is not None:
+            cache.put(key, html)
+    return html
+
+
+def write_network_page(html_path, html, assets='remote', **context):
+    '''Save the network graph as an HTML page (the page does not use plotly); context goes to the template.'''
+    with instrument.stage('step3', 'write_html', outputs=[html_path]):
+        write_page(html_path, render_page('network.html', network_html=html, **context), assets, drop=[PLOTLY_URL])
+
+
+def build_network_html(nodes_links_path=paths.JSON_NODES_LINKS, html_path=paths.HTML_NETWORK, physics=False,
+                       assets='remote', cache=figure_cache):
+    '''
+    Create the network page from the nodes and links file (in any format of languageweb/nodes_links.py)
+    and return the HTML generated by pyvis.
+    cache: figure cache of the layout and the pyvis HTML, None computes them in any case
+    '''
+    # Read the nodes and links from the JSON file.
+    with instrument.stage('step3', 'read_json') as counts:
+        data = read_nodes_links(nodes_links_path)
+        counts.update(nodes=len(data['nodes']), links=len(data['links']))
+
+    html = network_html(data, physics, assets != 'remote', cache)
+    write_network_page(html_path, html, assets)
+    return html
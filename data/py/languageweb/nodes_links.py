@@ -0,0 +1,186 @@
+'''
+Nodes and links of the network (nodes_links.json).
+The nodes are the informants/interlocutors and the languages, the links connect an informant/interlocutor
+and a language for every interview in which the language is used.
+Besides the indented JSON format the network data can be stored in a compact columnar form: one table
+of the distinct strings and, per node and link field, an array of indices into it. It is written as JSON
+(*.columnar.json) or as a NumPy .npz file; read_nodes_links() accepts all three formats.
+'''
+
+import csv
+import json
+
+from languageweb import instrument, paths
+from languageweb.colors import language_color_network
+from languageweb.survey import survey_from_json
+from languageweb.validate import canonical_dataset
+
+NODES_LINKS_FORMATS = ['json', 'columnar', 'npz']
+
+# Marks a columnar JSON file
+COLUMNAR_FORMAT = 'nodes_links/columnar'
+
+NODE_FIELDS = ('id', 'type', 'color')
+LINK_FIELDS = ('interview', 'source', 'target')
+
+######################################################################################################################
+
+def read_labels(csv_path, header):
+    '''Return the labels in the first column of a CSV file, without the header.'''
+    labels = []
+    with open(csv_path, encoding='utf-8-sig') as csvf:
+        csvReader = csv.reader(csvf, delimiter=';')
+        for row in csvReader:
+            if row[0] != header:
+                labels.append(row[0])
+    return labels
+
+
+def node_type_index(categories):
+    '''Map every informant/interlocutor label to its category, e.g. partner -> interlocutors.'''
+    index = {}
+    for category in categories:
+        for label in read_labels(category.csv_path, category.label_column):
+            index.setdefault(label, category)
+    return index
+
+
+def node_data(node, types):
+    '''Return the node with its type and color, every node which is not an informant/interlocutor is a language.'''
+    category = types.get(node)
+    if category is None:
+        return {'id': node, 'type': 'language', 'color': language_color_network}
+    return {'id': node, 'type': category.node_type, 'color': category.network_color}
+
+
+######################################################################################################################
+
+def create_nodes_links(json_path, nodes_links_path, types, format=None):
+    '''
+    Create the list of unique nodes, classified by the type index, and the links between
+    informants/interlocutors and languages, and write both in one go (format: see write_nodes_links).
+    '''
+    # Read the json file and parse the answers once into the survey matrix.
+    with instrument.stage('step2', 'read_json') as counts:
+        with open(json_path, 'r', encoding='utf-8') as jsonf:
+            survey = survey_from_json(json.load(jsonf))
+        counts.update(items=len(survey.items), informants=len(survey.informants), languages=len(survey.languages))
+
+    with instrument.stage('step2', 'nodes_links') as counts:
+        # The nodes are the informants/interlocutors, e.g. partner, at the bank, instagram,
+        # and the languages, e.g. Turkish, German, Kurmanji.
+        nodes = [node_data(node, types) for node in dict.fromkeys(survey.items + survey.languages)]
+        links = []
+        network_data = {'nodes': nodes, 'links': links}
+
+        # Add one link per informant/interlocutor, interview and language.
+        for item, masks in enumerate(survey.answers):
+            source = survey.items[item]
+            for informant, mask in enumerate(masks):
+                for lang in survey.mask_languages(mask):
+                    links.append({
+                        'interview': survey.informants[informant], # number of interviewee
+                        'source': source, # interlocutor/informant, e.g. partner, at the bank, instagram
+                        'target': survey.languages[lang] # language
+                    })
+        counts.update(nodes=len(nodes), links=len(links))
+
+    # Write the network data to a json file.
+    with instrument.stage('step2', 'write_json', outputs=[nodes_links_path]):
+        write_nodes_links(network_data, nodes_links_path, format)
+
+
+def build_nodes_links(json_path=paths.JSON_ALL_DATA, nodes_links_path=paths.JSON_NODES_LINKS, categories=None,
+                      format=None):
+    '''
+    Create nodes_links.json from the JSON file of step 1, typing the nodes by the categories (by default
+    those of the validated canonical dataset).
+    '''
+    if categories is None:
+        categories = canonical_dataset()
+    # Index the informants/interlocutors by their category once, for determining the type of the nodes.
+    with instrument.stage('step2', 'type_index') as counts:
+        types = node_type_index(categories)
+        counts['labels'] = len(types)
+    create_nodes_links(json_path, nodes_links_path, types, format)
+
+
+######################################################################################################################
+
+def file_format(path):
+    '''Return the format of a nodes and links file from its name: npz, columnar (*.columnar.json) or json.'''
+    if path.endswith('.npz'):
+        return 'npz'
+    if path.endswith('.columnar.json'):
+        return 'columnar'
+    return 'json'
+
+
+def to_columns(network_data):
+    '''Encode the nodes and links as a string table and one list of string indices per field.'''
+    strings = {}
+
+    def column(records, field):
+        return [strings.setdefault(record[field], len(strings)) for record in records]
+
+    nodes = {field: column(network_data['nodes'], field) for field in NODE_FIELDS}
+    links = {field: column(network_data['links'], field) for field in LINK_FIELDS}
+    return {'format': COLUMNAR_FORMAT, 'strings': list(strings), 'nodes': nodes, 'links': links}
+
+
+def from_columns(columns):
+    '''Decode the columnar form into the nodes and links of nodes_links.json.'''
+    strings = columns['strings']
+
+    def records(table, fields):
+        values = [[strings[i] for i in table[field]] for field in fields]
+        return [dict(zip(fields, record)) for record in zip(*values)]
+
+    return {'nodes': records(columns['nodes'], NODE_FIELDS), 'links': records(columns['links'], LINK_FIELDS)}
+
+
+def write_nodes_links(network_data, path, format=None):
+    '''Write the nodes and links in the given format (by default the one of the file name).'''
+    format = format or file_format(path)
+    if format == 'npz':
+        import numpy as np
+
+        columns = to_columns(network_data)
+        arrays = {'strings': np.array(columns['strings'], dtype=str)}
+        for table in ('nodes', 'links'):
+            for field, indices in columns[table].items():
+                arrays[f'{table}_{field}'] = np.array(indices, dtype=np.int32)
+        # np.savez appends .npz to other file names, so the file is opened here.
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+    elif format == 'columnar':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(to_columns(network_data), f, ensure_ascii=False, separators=(',', ':'))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(network_data, f, ensure_ascii=False, indent=4)
+
+
+def read_nodes_links(path):
+    '''Read a nodes and links file in any of the formats and return the nodes and links as in nodes_links.json.'''
+    if file_format(path) == 'npz':
+        import numpy as np
+
+        with np.load(path) as arrays:
+            columns = {
+                'strings': arrays['strings'].tolist(),
+                'nodes': {field: arrays['nodes_' + field].tolist() for field in NODE_FIELDS},
+                'links': {field: arrays['links_' + field].tolist() for field in LINK_FIELDS},
+            }
+        return from_columns(columns)
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') == COLUMNAR_FORMAT:
+        return from_columns(data)
+    return data
+
+
+def convert_nodes_links(source, target, format=None):
+    '''Convert a nodes and links file to another format, e.g. nodes_links.json <-> nodes_links.npz.'''
+    write_nodes_links(read_nodes_links(source), target, format)
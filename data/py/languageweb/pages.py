@@ -0,0 +1,26 @@
+'''
+Page templates of network.html and sankey.html.
+Both pages extend one base layout (templates/base.html: head, navigation bar and container) and fill its
+title, brand, nav and content blocks. The jinja environment and the compiled templates are kept for the
+whole process, so rendering many variants of a page (e.g. per language or per category) only costs the
+rendering itself. The rendered page is written in one go by languageweb/assets.py:write_page.
+'''
+
+import os
+from functools import lru_cache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+
+@lru_cache(maxsize=None)
+def environment():
+    '''Return the jinja environment of the page templates, created once per process.'''
+    from jinja2 import Environment, FileSystemLoader
+
+    # The pages embed rendered HTML fragments, so nothing is escaped.
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIR), auto_reload=False)
+
+
+def render_page(name, **context):
+    '''Render a page template (e.g. sankey.html) with the given variables.'''
+    return environment().get_template(name).render(**context)
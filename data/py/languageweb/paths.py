@@ -0,0 +1,37 @@
+'''
+Default locations of the pipeline inputs and outputs.
+All paths are anchored at the repository root, so the step scripts work from any working directory.
+'''
+
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+CSV_DIR = os.path.join(DATA_DIR, 'csv')
+XLSX_DIR = os.path.join(DATA_DIR, 'xlsx')
+CANONICAL_CSV_DIR = os.path.join(DATA_DIR, 'canonical')
+JSON_DIR = os.path.join(DATA_DIR, 'json')
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+FIGURE_CACHE_DIR = os.path.join(CACHE_DIR, 'figures')
+
+CSV_MEDIA = os.path.join(CSV_DIR, 'media.csv')
+CSV_PLACES = os.path.join(CSV_DIR, 'places.csv')
+CSV_SITUATIONS = os.path.join(CSV_DIR, 'situations.csv')
+CSV_INTERLOCUTORS = os.path.join(CSV_DIR, 'interlocutors.csv')
+
+JSON_ALL_DATA = os.path.join(JSON_DIR, 'all_informants_interlocutors.json')
+JSON_NODES_LINKS = os.path.join(JSON_DIR, 'nodes_links.json')
+JSON_NODES_LINKS_COLUMNAR = os.path.join(JSON_DIR, 'nodes_links.columnar.json')
+NPZ_NODES_LINKS = os.path.join(JSON_DIR, 'nodes_links.npz')
+JSON_SANKEY_DIR = os.path.join(JSON_DIR, 'sankey')
+JSON_SANKEY_FLOWS = os.path.join(JSON_DIR, 'sankey_flows.json')
+JSON_COMBINATIONS = os.path.join(JSON_DIR, 'combinations.json')
+JSON_NEIGHBOURS = os.path.join(JSON_DIR, 'neighbours.json')
+JSON_SUBGRAPH_DIR = os.path.join(JSON_DIR, 'subgraphs')
+STATISTICS_DIR = os.path.join(DATA_DIR, 'statistics')
+
+HTML_NETWORK = os.path.join(ROOT_DIR, 'network.html')
+HTML_SANKEY = os.path.join(ROOT_DIR, 'sankey.html')
+HTML_COMBINATIONS = os.path.join(ROOT_DIR, 'combinations.html')
+HTML_VIEWS_DIR = os.path.join(ROOT_DIR, 'views')
+JSONL_REPORT = os.path.join(ROOT_DIR, 'build_report.jsonl')
@@ -0,0 +1,175 @@
+'''
+The pipeline (steps 1 to 4) as stages of the incremental build in languageweb/dag.py.
+The CSV files are validated and normalised first (languageweb/validate.py), the steps then read the
+canonical dataset, so invalid input stops the build before anything is rendered. Every stage is only
+re-run when the content of its inputs changed since the last build. The package modules implementing a
+stage are inputs too, so edits to the color tables or the pyvis/plotly options trigger a rebuild.
+With source='xlsx' the CSV files are first updated from the workbooks in data/xlsx (languageweb/xlsx.py),
+skipping the unchanged sheets.
+'''
+
+import os
+from functools import partial
+
+from languageweb import dag, paths
+from languageweb.categories import CATEGORIES, dataset_categories
+from languageweb.combinations import build_combinations
+from languageweb.csvjson import category_csv_files, csv_to_json
+from languageweb.figcache import figure_cache
+from languageweb.network_page import build_network_html
+from languageweb.nodes_links import build_nodes_links
+from languageweb.pages import TEMPLATE_DIR
+from languageweb.sankey import build_sankey_html, figure_json_path
+from languageweb.similarity import build_neighbours
+from languageweb.stats import build_statistics
+from languageweb.subgraph import build_views
+from languageweb.validate import build_canonical
+from languageweb.xlsx import ingest, workbook_path
+
+state_path = os.path.join(paths.CACHE_DIR, 'build_state.json')
+
+csv_files = [category.csv_path for category in CATEGORIES]
+
+# The categories and step 1 input files of the validated, normalised dataset
+canonical_categories = dataset_categories(paths.CANONICAL_CSV_DIR)
+canonical_csv_files = category_csv_files(canonical_categories)
+canonical_files = [category.csv_path for category in canonical_categories]
+
+
+def package_file(module):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), module + '.py')
+
+
+def template_files(page):
+    return [os.path.join(TEMPLATE_DIR, 'base.html'), os.path.join(TEMPLATE_DIR, page)]
+
+
+def create_stages(assets='remote', lazy=False, cache=figure_cache, source='csv', force_xlsx=False):
+    stages = []
+    if source == 'xlsx':
+        stages.append(dag.Stage(
+            'xlsx',
+            partial(ingest, force=force_xlsx, force_option='--force-xlsx'),
+            inputs=[workbook_path(category) for category in CATEGORIES] + [package_file('xlsx')],
+            outputs=csv_files,
+        ))
+    return stages + [
+        dag.Stage(
+            'validate',
+            build_canonical,
+            inputs=csv_files + [package_file('validate'), package_file('categories'), package_file('colors')],
+            outputs=canonical_files,
+            deps=['xlsx'] if source == 'xlsx' else [],
+        ),
+        dag.Stage(
+            'step1',
+            partial(csv_to_json, canonical_csv_files),
+            inputs=canonical_files + [package_file('csvjson'), package_file('categories')],
+            outputs=[paths.JSON_ALL_DATA],
+            deps=['validate'],
+        ),
+        dag.Stage(
+            'step2',
+            partial(build_nodes_links, categories=canonical_categories),
+            inputs=[paths.JSON_ALL_DATA] + canonical_files + [
+                package_file('nodes_links'),
+                package_file('survey'),
+                package_file('categories'),
+                package_file('colors'),
+            ],
+            outputs=[paths.JSON_NODES_LINKS],
+            deps=['step1'],
+        ),
+        dag.Stage(
+            'step3',
+            partial(build_network_html, assets=assets, cache=cache),
+            inputs=[paths.JSON_NODES_LINKS] + [
+                package_file('network_page'),
+                package_file('network'),
+                package_file('assets'),
+                package_file('pages'),
+            ] + template_files('network.html'),
+            outputs=[paths.HTML_NETWORK],
+            params={'assets': assets},
+            deps=['step2'],
+        ),
+        dag.Stage(
+            'step4',
+            partial(build_sankey_html, canonical_categories, assets=assets, lazy=lazy, cache=cache),
+            inputs=canonical_files + [
+                package_file('sankey'),
+                package_file('survey'),
+                package_file('categories'),
+                package_file('colors'),
+                package_file('flows'),
+                package_file('assets'),
+                package_file('pages'),
+            ] + template_files('sankey.html'),
+            # The lazy page loads its diagrams from one JSON file per category.
+            outputs=[paths.HTML_SANKEY, paths.JSON_SANKEY_FLOWS] + (
+                [figure_json_path(paths.JSON_SANKEY_DIR, category) for category in canonical_categories] if lazy else []
+            ),
+            params={'assets': assets, 'lazy': lazy},
+            deps=['validate'],
+        ),
+        dag.Stage(
+            'statistics',
+            partial(build_statistics, canonical_categories),
+            inputs=canonical_files + [package_file('stats'), package_file('survey'), package_file('categories')],
+            outputs=[os.path.join(paths.STATISTICS_DIR, 'statistics.json')],
+            deps=['validate'],
+        ),
+        dag.Stage(
+            'combinations',
+            partial(build_combinations, canonical_categories, assets=assets, cache=cache),
+            inputs=canonical_files + [
+                package_file('combinations'),
+                package_file('survey'),
+                package_file('categories'),
+                package_file('colors'),
+                package_file('sankey'),
+                package_file('assets'),
+                package_file('pages'),
+            ] + template_files('sankey.html'),
+            outputs=[paths.HTML_COMBINATIONS, paths.JSON_COMBINATIONS],
+            params={'assets': assets},
+            deps=['validate'],
+        ),
+        dag.Stage(
+            'similarity',
+            build_neighbours,
+            inputs=[paths.JSON_ALL_DATA, package_file('similarity'), package_file('survey')],
+            outputs=[paths.JSON_NEIGHBOURS],
+            deps=['step1'],
+        ),
+        dag.Stage(
+            'views',
+            partial(build_views, assets=assets, cache=cache),
+            inputs=[paths.JSON_NODES_LINKS] + [
+                package_file('subgraph'),
+                package_file('network_page'),
+                package_file('network'),
+                package_file('assets'),
+                package_file('pages'),
+            ] + template_files('network.html'),
+            outputs=[os.path.join(paths.HTML_VIEWS_DIR, 'views.json')],
+            params={'assets': assets},
+            deps=['step2'],
+        ),
+    ]
+
+
+def build(steps=(), force=False, assets='remote', lazy=False, cache=figure_cache, source='csv', force_xlsx=False):
+    '''
+    Run the stages of the pipeline whose inputs changed (all of them with force), only steps if given.
+    cache: figure cache of steps 3 and 4 and of the views, None renders all figures
+    source: csv builds from the CSV files, xlsx updates them from the workbooks first
+    force_xlsx: overwrite CSV files edited by hand with the content of their workbooks (source xlsx)
+    '''
+    if source not in ('csv', 'xlsx'):
+        raise ValueError(f'unknown source {source}, expected csv or xlsx')
+    stages = create_stages(assets=assets, lazy=lazy, cache=cache, source=source, force_xlsx=force_xlsx)
+    unknown = set(steps) - {stage.name for stage in stages}
+    if unknown:
+        raise ValueError('unknown step(s): ' + ', '.join(sorted(unknown)))
+    return dag.run(stages, state_path, force=force, only=steps)
@@ -0,0 +1,217 @@
+"""
+Sankey page (sankey.html) with one diagram per category of the registry in languageweb/categories.py.
+The diagrams are rendered concurrently in a process pool, since fig.to_html dominates the run time.
+With lazy=True every figure is written to its own JSON file, which the page only fetches and plots when its
+section scrolls into view or its navigation link is clicked (the page has to be served over HTTP).
+plotly is only imported when a figure is created. The rendered figures are kept in the figure cache
+(languageweb/figcache.py), so changes to the page itself do not render them again.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+
+from languageweb import instrument, paths
+from languageweb.assets import write_page
+from languageweb.colors import languages_colors_links, languages_colors_nodes
+from languageweb.figcache import cache_key, figure_cache, source_token
+from languageweb.flows import all_flows
+from languageweb.pages import render_page
+from languageweb.survey import load_survey
+from languageweb.validate import canonical_dataset
+
+# Style of the diagrams, part of the cache key of the rendered figures
+node_style = dict(pad=25, thickness=20, line=dict(color="black", width=0.5))
+figure_layout = dict(font_size=15, width=1250, height=1000)
+
+
+def create_figure(category, flows):
+    """
+    Create the Sankey diagram of one category from its flows (language -> item). Flows with node_color,
+    link_color and title lists/strings (e.g. the language combinations) set the colors and title themselves.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        data=[
+            go.Sankey(
+                node=dict(
+                    **node_style,
+                    label=flows["label"],
+                    color=flows.get("node_color")
+                    or [
+                        languages_colors_nodes.get(label, category.item_color)
+                        for label in flows["label"]
+                    ],
+                ),
+                link=dict(
+                    source=flows["source"],  # Indices correspond to labels
+                    target=flows["target"],
+                    value=flows["value"],
+                    color=flows.get("link_color")
+                    or [
+                        languages_colors_links[label]
+                        for label in flows["link_language"]
+                    ],
+                ),
+            )
+        ]
+    )
+
+    fig.update_layout(title_text=flows.get("title", category.title), **figure_layout)
+    return fig
+
+
+def render_figure(category, flows):
+    """Return the HTML fragment of the Sankey diagram of one category."""
+    return create_figure(category, flows).to_html(full_html=False, include_plotlyjs=False)
+
+
+def render_figure_json(category, flows):
+    """Return the JSON (data and layout) of the Sankey diagram of one category."""
+    return create_figure(category, flows).to_json()
+
+
+def figure_key(category, flows, render):
+    """
+    Return the cache key of a rendered diagram: a hash of its flows, colors, style, the plotly version and
+    the source of this module (create_figure).
+    """
+    return cache_key(
+        render.__name__,
+        version("plotly"),
+        source_token(__file__),
+        category.title,
+        category.item_color,
+        flows,
+        languages_colors_links,
+        languages_colors_nodes,
+        node_style,
+        figure_layout,
+    )
+
+
+def render_figures(categories, flows, workers=None, render=render_figure, cache=figure_cache):
+    """
+    Render the diagrams of all categories, in a process pool unless workers is 1.
+    Diagrams found in the cache are not rendered again; cache=None renders all of them.
+    """
+    category_flows = [flows[category.name] for category in categories]
+    if cache is None:
+        keys = figures = [None] * len(categories)
+    else:
+        keys = [figure_key(c, f, render) for c, f in zip(categories, category_flows)]
+        figures = [cache.get(key) for key in keys]
+
+    missing = [i for i, figure in enumerate(figures) if figure is None]
+    if workers == 1 or len(missing) < 2:
+        rendered = [render(categories[i], category_flows[i]) for i in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(render, [categories[i] for i in missing], [category_flows[i] for i in missing]))
+
+    figures = list(figures)
+    for i, figure in zip(missing, rendered):
+        figures[i] = figure
+        if cache is not None:
+            cache.put(keys[i], figure)
+    return figures
+
+
+def figure_json_path(json_dir, category):
+    """Return the JSON file of the diagram of a category (lazy pages)."""
+    return os.path.join(json_dir, category.name + ".json")
+
+
+def write_figures_json(json_dir, html_path, categories, figures_json):
+    """Write one JSON file per diagram and return their URLs relative to the page."""
+    os.makedirs(json_dir, exist_ok=True)
+    urls = []
+    for category, figure_json in zip(categories, figures_json):
+        json_path = figure_json_path(json_dir, category)
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(figure_json)
+        urls.append(os.path.relpath(json_path, os.path.dirname(os.path.abspath(html_path))).replace(os.sep, "/"))
+    return urls
+
+
+def write_html(html_path, categories, figures_html=None, figure_urls=None, assets="remote", title=None):
+    """
+    Write the page with one section per category, either with the rendered diagrams (figures_html)
+    or with empty sections loading the diagrams from figure_urls.
+    """
+    lazy = figure_urls is not None
+    sections = zip(categories, figure_urls if lazy else figures_html)
+    html = render_page("sankey.html", categories=categories, sections=sections, lazy=lazy, title=title)
+    write_page(html_path, html, assets)
+
+
+def write_flows(flows_path, flows):
+    """Write the flows of all categories (category name -> flows) as compact JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(flows_path)), exist_ok=True)
+    with open(flows_path, "w", encoding="utf-8") as f:
+        json.dump(flows, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def read_flows(flows_path):
+    with open(flows_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_sankey(
+    categories,
+    flows,
+    html_path=paths.HTML_SANKEY,
+    json_dir=paths.JSON_SANKEY_DIR,
+    workers=None,
+    assets="remote",
+    lazy=False,
+    cache=figure_cache,
+):
+    """Render the diagrams of the flows (only those missing from the cache) and write the Sankey page."""
+    # The figures are rendered in worker processes, which are not covered by --profile and --trace-memory.
+    with instrument.stage("step4", "render") as counts:
+        render = render_figure_json if lazy else render_figure
+        figures = render_figures(categories, flows, workers=workers, render=render, cache=cache)
+        counts.update(figures=len(figures), characters=sum(len(figure) for figure in figures))
+
+    with instrument.stage("step4", "write_html", outputs=[html_path]):
+        if lazy:
+            figure_urls = write_figures_json(json_dir, html_path, categories, figures)
+            write_html(html_path, categories, figure_urls=figure_urls, assets=assets)
+        else:
+            write_html(html_path, categories, figures_html=figures, assets=assets)
+
+
+def build_sankey_html(
+    categories=None,
+    html_path=paths.HTML_SANKEY,
+    json_dir=paths.JSON_SANKEY_DIR,
+    workers=None,
+    assets="remote",
+    lazy=False,
+    cache=figure_cache,
+    flows_path=paths.JSON_SANKEY_FLOWS,
+):
+    """
+    Create the Sankey page of the categories (with lazy=True also the JSON files of the diagrams).
+    categories: by default those of the validated canonical dataset
+    cache: figure cache of the rendered diagrams, None renders all of them
+    flows_path: file keeping the flows, which languageweb/delta.py updates when an informant is appended
+    """
+    if categories is None:
+        categories = canonical_dataset()
+    # Parse the CSV files once into the survey matrix and aggregate the flows of all categories
+    with instrument.stage("step4", "flows", outputs=[flows_path]) as counts:
+        survey = load_survey(categories)
+        flows = all_flows(survey, categories)
+        write_flows(flows_path, flows)
+        counts.update(
+            informants=len(survey.informants),
+            items=len(survey.items),
+            languages=len(survey.languages),
+            links=sum(len(category_flows["value"]) for category_flows in flows.values()),
+        )
+
+    write_sankey(categories, flows, html_path, json_dir, workers, assets, lazy, cache)
@@ -0,0 +1,228 @@
+'''
+Local query server (asyncio, standard library only) for the pages and for ad-hoc slices of the data.
+The outputs of the pipeline (nodes_links.json, sankey_flows.json and statistics.json, built from the
+canonical dataset) are loaded once at startup, so the answers agree with the built files and pages; the
+server then answers JSON queries without re-running any step:
+- /api/nodes-links?language=Kurmanji&type=media&interview=12 (every filter repeatable, see languageweb/subgraph.py)
+- /api/flows?category=media (all categories without category)
+- /api/statistics?part=language_item&key=partner (the whole index without part)
+The responses are kept in an LRU cache and carry an ETag; a request with a matching If-None-Match is
+answered with 304 Not Modified and no body. All other paths serve the files of the repository root
+(index.html, network.html, sankey.html and their assets), so lazy pages work offline too.
+Usage: python -m languageweb serve [--host 127.0.0.1] [--port 8765] [--cache-size 256]
+'''
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from languageweb import paths
+from languageweb.nodes_links import read_nodes_links
+from languageweb.sankey import read_flows
+from languageweb.subgraph import filter_nodes_links
+
+STATUS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+# Request bodies up to this size are read and ignored, the connection is closed after larger ones.
+MAX_BODY = 64 * 1024
+
+
+class QueryError(Exception):
+    '''A query which cannot be answered, with its HTTP status.'''
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Model:
+    '''
+    The data the queries are answered from, loaded once from the outputs of the pipeline.
+    network: nodes and links (nodes_links.json), flows: Sankey flows per category, statistics: statistics index
+    '''
+
+    def __init__(self, nodes_links_path=paths.JSON_NODES_LINKS, flows_path=paths.JSON_SANKEY_FLOWS,
+                 statistics_path=os.path.join(paths.STATISTICS_DIR, 'statistics.json')):
+        missing = [path for path in (nodes_links_path, flows_path, statistics_path) if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError('not built yet (run build.py): ' + ', '.join(missing))
+        self.network = read_nodes_links(nodes_links_path)
+        self.flows = read_flows(flows_path)
+        with open(statistics_path, encoding='utf-8') as f:
+            self.statistics = json.load(f)
+
+    def query(self, path, params):
+        '''Return the result of a query (path below /api, params as returned by parse_qs).'''
+        if path == '/nodes-links':
+            return filter_nodes_links(self.network, params.get('language'), params.get('type'), params.get('interview'))
+        if path == '/flows':
+            if 'category' not in params:
+                return self.flows
+            return {name: self.lookup(self.flows, name, 'category') for name in params['category']}
+        if path == '/statistics':
+            if 'part' not in params:
+                return self.statistics
+            part = self.lookup(self.statistics, params['part'][0], 'part')
+            if 'key' not in params:
+                return part
+            if not isinstance(part, dict):
+                raise QueryError(400, f'{params["part"][0]} has no keys')
+            return {key: self.lookup(part, key, 'key') for key in params['key']}
+        raise QueryError(404, f'unknown query {path}')
+
+    @staticmethod
+    def lookup(data, key, name):
+        if key not in data:
+            raise QueryError(404, f'unknown {name} {key}')
+        return data[key]
+
+
+class ResponseCache:
+    '''LRU cache of encoded query results: key -> (ETag, body).'''
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        body = json.dumps(compute(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entry = ('"' + hashlib.sha256(body).hexdigest()[:32] + '"', body)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+
+class Server:
+    '''HTTP/1.1 server answering the queries of a model and serving the files of root.'''
+
+    def __init__(self, model, root=paths.ROOT_DIR, cache_size=256):
+        self.model = model
+        self.root = os.path.abspath(root)
+        self.cache = ResponseCache(cache_size)
+
+    def handle(self, method, target, headers):
+        '''Return (status, extra headers, body) of a request.'''
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        url = urlsplit(target)
+        path = unquote(url.path)
+        try:
+            if path.startswith('/api/'):
+                params = parse_qs(url.query)
+                # Equal queries share a cache entry regardless of the order of their parameters.
+                key = (path, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+                etag, body = self.cache.get_or_compute(key, lambda: self.model.query(path[4:], params))
+                content_type = 'application/json; charset=utf-8'
+            else:
+                etag, file_path, content_type = self.find_file(path)
+                body = None
+        except QueryError as e:
+            return self.error(e.status, str(e))
+        except Exception as e:
+            return self.error(500, f'{type(e).__name__}: {e}')
+
+        extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, extra, b''
+        if body is None:
+            with open(file_path, 'rb') as f:
+                body = f.read()
+        extra['Content-Type'] = content_type
+        return 200, extra, body
+
+    @staticmethod
+    def error(status, message):
+        body = json.dumps({'error': message}).encode('utf-8')
+        return status, {'Content-Type': 'application/json; charset=utf-8'}, body
+
+    def find_file(self, path):
+        '''Return the ETag, path and content type of a file below the root (hidden files are not served).'''
+        file_path = os.path.abspath(os.path.join(self.root, path.lstrip('/')))
+        if os.path.isdir(file_path):
+            file_path = os.path.join(file_path, 'index.html')
+        relative = os.path.relpath(file_path, self.root)
+        if relative.startswith('..') or any(part.startswith('.') for part in relative.split(os.sep)) \
+                or not os.path.isfile(file_path):
+            raise QueryError(404, f'not found: {path}')
+        stat = os.stat(file_path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        return etag, file_path, content_type
+
+    async def connection(self, reader, writer):
+        '''Answer the requests of one connection until the client closes it.'''
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                # No request uses a body, but it has to be read, otherwise it is taken for the next request.
+                try:
+                    length = int(headers.get('content-length', '0'))
+                except ValueError:
+                    length = -1
+                body_read = 0 <= length <= MAX_BODY and 'transfer-encoding' not in headers
+                if body_read and length:
+                    await reader.readexactly(length)
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    status, extra, body = 400, {}, b''
+                    method, version = 'GET', 'HTTP/1.0'
+                else:
+                    status, extra, body = self.handle(method, target, headers)
+
+                keep_alive = body_read and version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                lines = [f'HTTP/1.1 {status} {STATUS[status]}', f'Content-Length: {len(body)}',
+                         'Access-Control-Allow-Origin: *', 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+                lines += [f'{name}: {value}' for name, value in extra.items()]
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(host='127.0.0.1', port=8765, cache_size=256, log=print):
+    '''Load the model and serve it until interrupted.'''
+    server = Server(Model(), cache_size=cache_size)
+    log(f'Serving on http://{host}:{port}/ (queries below /api/, Ctrl+C to stop)')
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
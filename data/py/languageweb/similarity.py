@@ -0,0 +1,116 @@
+'''
+Similarity of the informants' language use and a top-k neighbour index ("informants like this one").
+The profile of an informant is the set of (item, language) pairs of their answers, read from
+all_informants_interlocutors.json into the survey matrix (languageweb/survey.py). The pairwise Jaccard or
+cosine similarity of the profiles is computed with NumPy matrix products, a block of informants at a
+time, so the memory stays bounded by the block size instead of growing with the square of the number
+of informants. Only the k most similar informants of every informant are kept.
+Output: data/json/neighbours.json (or .npz): per informant the k nearest informants and their similarity
+'''
+
+import json
+
+from languageweb import instrument, paths
+from languageweb.survey import survey_from_json
+
+METRICS = ['jaccard', 'cosine']
+
+
+def profiles(survey):
+    '''Return the informant x (item, language) profile matrix as float32, without the unused pairs.'''
+    import numpy as np
+
+    matrix = survey.to_array().reshape(len(survey.informants), -1)
+    return matrix[:, matrix.any(axis=0)].astype(np.float32)
+
+
+def similarity_blocks(matrix, metric='jaccard', block_bytes=64 * 2**20):
+    '''
+    Yield (start, block) with the similarities of the informants start, start + 1, ... to all informants,
+    block_bytes bounding the size of one block.
+    '''
+    import numpy as np
+
+    n = matrix.shape[0]
+    sizes = matrix.sum(axis=1)
+    norms = np.sqrt(sizes)
+    rows = max(1, block_bytes // max(1, 4 * n))
+    for start in range(0, n, rows):
+        shared = matrix[start:start + rows] @ matrix.T
+        if metric == 'jaccard':
+            union = sizes[start:start + rows, None] + sizes[None, :] - shared
+        else:
+            union = norms[start:start + rows, None] * norms[None, :]
+        # Informants without answers are similar to no one.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            block = np.where(union > 0, shared / union, 0).astype(np.float32)
+        yield start, block
+
+
+def top_k(matrix, k=10, metric='jaccard', block_bytes=64 * 2**20):
+    '''
+    Return the indices (int32) and similarities (float32) of the k most similar informants of every
+    informant, as two arrays of shape (informants, k), most similar first (ties by index).
+    '''
+    import numpy as np
+
+    if metric not in METRICS:
+        raise ValueError(f'unknown metric {metric}, expected one of ' + ', '.join(METRICS))
+    n = matrix.shape[0]
+    k = min(k, max(n - 1, 0))
+    indices = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    for start, block in similarity_blocks(matrix, metric, block_bytes):
+        rows = np.arange(block.shape[0])
+        # An informant is not its own neighbour.
+        block[rows, start + rows] = -1
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        values = np.take_along_axis(block, candidates, axis=1)
+        # argpartition keeps any of the informants tied with the k-th similarity; keep the first ones instead.
+        threshold = values.min(axis=1)
+        for row in np.flatnonzero(np.count_nonzero(block >= threshold[:, None], axis=1) > k):
+            tied = np.flatnonzero(block[row] >= threshold[row])
+            candidates[row] = tied[np.lexsort((tied, -block[row, tied]))[:k]]
+            values[row] = block[row, candidates[row]]
+        order = np.lexsort((candidates, -values), axis=1)
+        indices[start:start + len(rows)] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:start + len(rows)] = np.take_along_axis(values, order, axis=1)
+    return indices, scores
+
+
+def write_neighbours(path, informants, indices, scores, metric):
+    '''Write the neighbour index, as NumPy arrays if path ends with .npz, otherwise as compact JSON.'''
+    import numpy as np
+
+    if path.endswith('.npz'):
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, informants=np.array(informants, dtype=str), indices=indices, scores=scores,
+                                metric=np.array(metric))
+        return
+    neighbours = {
+        informant: [[informants[j], round(float(score), 4)] for j, score in zip(row, row_scores) if score > 0]
+        for informant, row, row_scores in zip(informants, indices.tolist(), scores.tolist())
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metric': metric, 'k': indices.shape[1], 'neighbours': neighbours}, f, ensure_ascii=False,
+                  separators=(',', ':'))
+
+
+def build_neighbours(json_path=paths.JSON_ALL_DATA, neighbours_path=paths.JSON_NEIGHBOURS, k=10, metric='jaccard',
+                     block_bytes=64 * 2**20):
+    '''Compute the top-k neighbours of every informant from the JSON file of step 1 and write the index.'''
+    with instrument.stage('similarity', 'profiles') as counts:
+        with open(json_path, encoding='utf-8') as jsonf:
+            survey = survey_from_json(json.load(jsonf))
+        matrix = profiles(survey)
+        counts.update(informants=matrix.shape[0], features=matrix.shape[1])
+
+    with instrument.stage('similarity', 'top_k') as counts:
+        indices, scores = top_k(matrix, k, metric, block_bytes)
+        counts['neighbours'] = int((scores > 0).sum())
+
+    with instrument.stage('similarity', 'write', outputs=[neighbours_path]):
+        write_neighbours(neighbours_path, survey.informants, indices, scores, metric)
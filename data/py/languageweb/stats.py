@@ -0,0 +1,146 @@
+'''
+Statistics index of the survey, e.g. the share of informants using Şexbizinî with their children.
+The counts are collected in one pass over the answers of the survey matrix (the same extraction as the
+links of step 2) and exported as one JSON file for the pages and as CSV tables:
+- answered: per item, the informants who answered it
+- language_item: per item and language, the informants using the language and their share of the
+  informants who answered the item
+- informant_language: per informant and language, the items for which the informant uses the language
+  and their share of the items the informant answered
+- category_language: per category and language, the informants using the language for at least one item
+  of the category, the answers (links) naming the language and their shares
+Output: data/statistics/statistics.json, language_item.csv, informant_language.csv, category_language.csv
+'''
+
+import csv
+import json
+import os
+
+from languageweb import instrument, paths
+from languageweb.survey import load_survey
+from languageweb.validate import canonical_dataset
+
+
+def share(count, total):
+    return round(count / total, 4) if total else 0.0
+
+
+def statistics_index(survey):
+    '''Return the statistics index of a survey as a dict (see the module docstring).'''
+    n_languages = len(survey.languages)
+    item_counts = [0] * (len(survey.items) * n_languages)
+    item_answered = [0] * len(survey.items)
+    informant_counts = [0] * (len(survey.informants) * n_languages)
+    informant_answered = [0] * len(survey.informants)
+    categories = list(dict.fromkeys(name for name in survey.item_categories if name is not None))
+    category_index = {name: i for i, name in enumerate(categories)}
+    category_informants = [0] * (len(categories) * n_languages)
+    category_answers = [0] * (len(categories) * n_languages)
+
+    # One pass over all answers.
+    for item, masks in enumerate(survey.answers):
+        for informant, mask in enumerate(masks):
+            if not mask:
+                continue
+            item_answered[item] += 1
+            informant_answered[informant] += 1
+            for lang in survey.mask_languages(mask):
+                item_counts[item * n_languages + lang] += 1
+                informant_counts[informant * n_languages + lang] += 1
+
+        # The informants of a category are the union of the informant bitsets of its items.
+        category = category_index.get(survey.item_categories[item])
+        if category is not None:
+            for lang, bitset in survey.informant_sets[item].items():
+                category_informants[category * n_languages + lang] |= bitset
+                category_answers[category * n_languages + lang] += item_counts[item * n_languages + lang]
+
+    category_totals = [0] * len(categories)
+    for category in range(len(categories)):
+        category_totals[category] = sum(category_answers[category * n_languages:(category + 1) * n_languages])
+
+    return {
+        'informants': len(survey.informants),
+        'languages': survey.languages,
+        'answered': {label: item_answered[item] for item, label in enumerate(survey.items)},
+        'language_item': {
+            label: {
+                survey.languages[lang]: {
+                    'count': item_counts[item * n_languages + lang],
+                    'share': share(item_counts[item * n_languages + lang], item_answered[item]),
+                }
+                for lang in range(n_languages) if item_counts[item * n_languages + lang]
+            }
+            for item, label in enumerate(survey.items)
+        },
+        'informant_language': {
+            informant_id: {
+                survey.languages[lang]: {
+                    'count': informant_counts[informant * n_languages + lang],
+                    'share': share(informant_counts[informant * n_languages + lang], informant_answered[informant]),
+                }
+                for lang in range(n_languages) if informant_counts[informant * n_languages + lang]
+            }
+            for informant, informant_id in enumerate(survey.informants)
+        },
+        'category_language': {
+            name: {
+                survey.languages[lang]: {
+                    'informants': category_informants[category * n_languages + lang].bit_count(),
+                    'share': share(category_informants[category * n_languages + lang].bit_count(), len(survey.informants)),
+                    'answers': category_answers[category * n_languages + lang],
+                    'answer_share': share(category_answers[category * n_languages + lang], category_totals[category]),
+                }
+                for lang in range(n_languages) if category_answers[category * n_languages + lang]
+            }
+            for category, name in enumerate(categories)
+        },
+    }
+
+
+def write_csv(csv_path, header, rows):
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+        csvWriter = csv.writer(csvf, delimiter=';')
+        csvWriter.writerow(header)
+        csvWriter.writerows(rows)
+
+
+def write_statistics(index, output_dir):
+    '''Write the index as statistics.json and one CSV table per part, return the written files.'''
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, 'statistics.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+    tables = {
+        'language_item.csv': (['item', 'language', 'count', 'share'], index['language_item']),
+        'informant_language.csv': (['informant', 'language', 'count', 'share'], index['informant_language']),
+        'category_language.csv': (
+            ['category', 'language', 'informants', 'share', 'answers', 'answer_share'], index['category_language']
+        ),
+    }
+    files = [json_path]
+    for name, (header, part) in tables.items():
+        csv_path = os.path.join(output_dir, name)
+        write_csv(csv_path, header, (
+            [key, language] + list(values.values())
+            for key, languages in part.items() for language, values in languages.items()
+        ))
+        files.append(csv_path)
+    return files
+
+
+def build_statistics(categories=None, output_dir=paths.STATISTICS_DIR):
+    '''
+    Build the statistics index of the survey in the CSV files of the categories (by default those of the
+    validated canonical dataset) and export it.
+    '''
+    if categories is None:
+        categories = canonical_dataset()
+    with instrument.stage('statistics', 'index') as counts:
+        survey = load_survey(categories)
+        index = statistics_index(survey)
+        counts.update(items=len(survey.items), informants=len(survey.informants), languages=len(survey.languages))
+
+    with instrument.stage('statistics', 'write', outputs=[os.path.join(output_dir, 'statistics.json')]):
+        return write_statistics(index, output_dir)
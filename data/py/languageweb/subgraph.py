@@ -0,0 +1,130 @@
+'''
+Filtered views of the network: subgraphs of nodes_links.json restricted to some languages, node types
+(interlocutors, places, situations, media) and/or informants (interviews).
+A subgraph keeps the links matching all given filters and the nodes they connect, in the order of the
+full network, so it can be written in any format of languageweb/nodes_links.py or rendered as a small
+network page which loads and stabilises much faster than the full web. build_views writes one page and
+one JSON shard per language and per node type, and a views.json listing them.
+Output: views/network-<kind>-<name>.html, data/json/subgraphs/<kind>-<name>.json and views/views.json
+'''
+
+import json
+import os
+import re
+import unicodedata
+
+from languageweb import instrument, paths
+from languageweb.figcache import figure_cache
+from languageweb.network_page import network_html, write_network_page
+from languageweb.nodes_links import read_nodes_links, write_nodes_links
+
+VIEW_KINDS = ['language', 'type']
+
+
+def filter_nodes_links(data, languages=None, types=None, interviews=None):
+    '''
+    Return the subgraph of the nodes and links in data (as in nodes_links.json).
+    languages: language names, types: node types of the informants/interlocutors, interviews: interview IDs;
+    a filter which is None keeps everything.
+    '''
+    languages = None if languages is None else set(languages)
+    interviews = None if interviews is None else {str(interview) for interview in interviews}
+    sources = None
+    if types is not None:
+        types = set(types)
+        sources = {node['id'] for node in data['nodes'] if node['type'] in types}
+
+    links = [
+        link for link in data['links']
+        if (languages is None or link['target'] in languages)
+        and (sources is None or link['source'] in sources)
+        and (interviews is None or link['interview'] in interviews)
+    ]
+    used = set()
+    for link in links:
+        used.add(link['source'])
+        used.add(link['target'])
+    nodes = [node for node in data['nodes'] if node['id'] in used]
+    return {'nodes': nodes, 'links': links}
+
+
+def slug(name):
+    '''Return a file name for a language or node type, e.g. Şexbizinî -> sexbizini, No language given -> no-language-given.'''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def build_subgraph(nodes_links_path=paths.JSON_NODES_LINKS, html_path=None, json_path=None, languages=None, types=None,
+                   interviews=None, title=None, physics=False, assets='remote', cache=figure_cache, data=None):
+    '''
+    Write the subgraph of the filters (see filter_nodes_links) as a network page (html_path) and/or as a
+    nodes and links file (json_path, in the format of its file name), and return it.
+    data: the nodes and links of the full network, read from nodes_links_path if not given
+    '''
+    if data is None:
+        with instrument.stage('subgraph', 'read_json') as counts:
+            data = read_nodes_links(nodes_links_path)
+            counts.update(nodes=len(data['nodes']), links=len(data['links']))
+
+    with instrument.stage('subgraph', 'filter') as counts:
+        subgraph = filter_nodes_links(data, languages, types, interviews)
+        counts.update(nodes=len(subgraph['nodes']), links=len(subgraph['links']))
+
+    if json_path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        with instrument.stage('subgraph', 'write_json', outputs=[json_path]):
+            write_nodes_links(subgraph, json_path)
+
+    if html_path is not None:
+        html_dir = os.path.dirname(os.path.abspath(html_path))
+        os.makedirs(html_dir, exist_ok=True)
+        # The stylesheet and the home page are at the repository root.
+        root = os.path.relpath(paths.ROOT_DIR, html_dir).replace(os.sep, '/') + '/'
+        html = network_html(subgraph, physics, assets != 'remote', cache)
+        write_network_page(html_path, html, assets, title=title, root='' if root == './' else root)
+    return subgraph
+
+
+def build_views(nodes_links_path=paths.JSON_NODES_LINKS, html_dir=paths.HTML_VIEWS_DIR, json_dir=paths.JSON_SUBGRAPH_DIR,
+                kinds=VIEW_KINDS, pages=True, physics=False, assets='remote', cache=figure_cache):
+    '''
+    Write the views of every language and every node type of the network (kinds: 'language' and/or 'type')
+    as pages to html_dir and JSON shards to json_dir (pages=False only writes the shards), list them in
+    html_dir/views.json and return the list.
+    '''
+    with instrument.stage('views', 'read_json') as counts:
+        data = read_nodes_links(nodes_links_path)
+        counts.update(nodes=len(data['nodes']), links=len(data['links']))
+
+    filters = []
+    if 'language' in kinds:
+        for node in data['nodes']:
+            if node['type'] == 'language':
+                filters.append(('language', node['id'], {'languages': [node['id']]}))
+    if 'type' in kinds:
+        for node_type in dict.fromkeys(node['type'] for node in data['nodes']):
+            if node_type != 'language':
+                filters.append(('type', node_type, {'types': [node_type]}))
+
+    views = []
+    for kind, name, kwargs in filters:
+        json_name = f'{kind}-{slug(name)}.json'
+        html_name = f'network-{kind}-{slug(name)}.html'
+        subgraph = build_subgraph(
+            html_path=os.path.join(html_dir, html_name) if pages else None,
+            json_path=os.path.join(json_dir, json_name),
+            title=f'Network: {name}', physics=physics, assets=assets, cache=cache, data=data, **kwargs,
+        )
+        views.append({
+            'kind': kind,
+            'name': name,
+            'page': html_name if pages else None,
+            'json': os.path.relpath(os.path.join(json_dir, json_name), html_dir).replace(os.sep, '/'),
+            'nodes': len(subgraph['nodes']),
+            'links': len(subgraph['links']),
+        })
+
+    os.makedirs(html_dir, exist_ok=True)
+    with open(os.path.join(html_dir, 'views.json'), 'w', encoding='utf-8') as f:
+        json.dump(views, f, ensure_ascii=False, indent=4)
+    return views
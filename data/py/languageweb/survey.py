@@ -0,0 +1,179 @@
+'''
+Columnar in-memory representation of the survey matrix (informant x item x language).
+The answers are parsed once: informants, items and languages are interned to integer IDs, every answer
+is stored as a bitmask over the language IDs, and per (item, language) the informants using it are kept
+as an informant bitset. Counting informants is then a popcount instead of a Counter loop over strings.
+Input: the category CSV files (load_survey) or the JSON file of step 1 (survey_from_json)
+'''
+
+import csv
+
+from languageweb.categories import CATEGORIES
+
+
+def split_answer(value):
+    '''Split an answer like "Kurmanji,Şexbizinî , Turkish" into stripped language names.'''
+    languages = []
+    for lang in value.split(','):
+        lang = lang.strip()
+        if lang:
+            languages.append(lang)
+    return languages
+
+
+def to_bitset(indices, size):
+    '''Return an int with the bits at the given indices set.'''
+    bits = bytearray((size + 7) >> 3)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def bit_indices(bitset):
+    '''Return the indices of the set bits of an int, in ascending order.'''
+    indices = []
+    while bitset:
+        low = bitset & -bitset
+        indices.append(low.bit_length() - 1)
+        bitset ^= low
+    return indices
+
+
+class Survey:
+    '''
+    informants: interview IDs (the CSV column headers), the position is the informant ID
+    items: item labels (e.g. partner, at the bank, instagram), the position is the item ID
+    item_categories: category name of every item, None if unknown
+    languages: language names, the position is the language ID and the bit in the answer masks
+    answers: per item, one language bitmask per informant (0 = no answer)
+    informant_sets: per item, a dict language ID -> bitset of the informants using that language
+    '''
+
+    def __init__(self, informants=()):
+        self.informants = []
+        self.informant_index = {}
+        self.items = []
+        self.item_index = {}
+        self.item_categories = []
+        self.languages = []
+        self.language_index = {}
+        self.answers = []
+        self.informant_sets = []
+        # Answer string -> mask and mask -> language IDs, the survey only has a few distinct answers.
+        self._masks = {}
+        self._mask_languages = {}
+        for informant in informants:
+            self.informant_id(informant)
+
+    def informant_id(self, informant):
+        '''Return the ID of an informant, interning it on first use.'''
+        index = self.informant_index.get(informant)
+        if index is None:
+            index = self.informant_index[informant] = len(self.informants)
+            self.informants.append(informant)
+        return index
+
+    def language_id(self, language):
+        '''Return the ID of a language, interning it on first use.'''
+        index = self.language_index.get(language)
+        if index is None:
+            index = self.language_index[language] = len(self.languages)
+            self.languages.append(language)
+        return index
+
+    def parse_answer(self, value):
+        '''Return the language bitmask of an answer string.'''
+        if value is None:
+            return 0
+        mask = self._masks.get(value)
+        if mask is None:
+            mask = 0
+            for lang in split_answer(value):
+                mask |= 1 << self.language_id(lang)
+            self._masks[value] = mask
+        return mask
+
+    def mask_languages(self, mask):
+        '''Return the language IDs of a bitmask, in ascending order.'''
+        languages = self._mask_languages.get(mask)
+        if languages is None:
+            languages = self._mask_languages[mask] = bit_indices(mask)
+        return languages
+
+    def add_item(self, label, category, informant_ids, values):
+        '''Add one item with the answers (strings) of the given informants.'''
+        masks = [0] * len(self.informants)
+        # Group the informants by their answer, so every distinct answer is decoded only once.
+        groups = {}
+        for informant, value in zip(informant_ids, values):
+            mask = self.parse_answer(value)
+            masks[informant] = mask
+            if mask:
+                groups.setdefault(mask, []).append(informant)
+
+        sets = {}
+        for mask, informants in groups.items():
+            bitset = to_bitset(informants, len(self.informants))
+            for lang in self.mask_languages(mask):
+                sets[lang] = sets.get(lang, 0) | bitset
+
+        self.item_index[label] = len(self.items)
+        self.items.append(label)
+        self.item_categories.append(category)
+        self.answers.append(masks)
+        self.informant_sets.append(sets)
+
+    def category_items(self, category):
+        '''Return the IDs of the items of a category.'''
+        return [i for i, name in enumerate(self.item_categories) if name == category]
+
+    def counts(self, item):
+        '''Return a dict language ID -> number of informants using it for the item.'''
+        return {lang: bitset.bit_count() for lang, bitset in self.informant_sets[item].items()}
+
+    def to_array(self):
+        '''Return the survey as a NumPy boolean array of shape (informants, items, languages).'''
+        import numpy as np
+
+        n = len(self.informants)
+        array = np.zeros((n, len(self.items), len(self.languages)), dtype=bool)
+        for item, sets in enumerate(self.informant_sets):
+            for lang, bitset in sets.items():
+                bits = np.frombuffer(bitset.to_bytes((n + 7) >> 3, 'little'), dtype=np.uint8)
+                array[:, item, lang] = np.unpackbits(bits, bitorder='little')[:n].astype(bool)
+        return array
+
+
+######################################################################################################################
+
+def load_survey(categories=CATEGORIES):
+    '''Parse the CSV files of the categories into one Survey.'''
+    # Read the headers first, so all items share the same informant IDs even if a file lacks a column.
+    headers = []
+    for category in categories:
+        with open(category.csv_path, encoding='utf-8-sig') as csvf:
+            headers.append(next(csv.reader(csvf, delimiter=';')))
+
+    survey = Survey(informant for header in headers for informant in header[1:])
+
+    for category, header in zip(categories, headers):
+        informant_ids = [survey.informant_index[informant] for informant in header[1:]]
+        with open(category.csv_path, encoding='utf-8-sig') as csvf:
+            csvReader = csv.reader(csvf, delimiter=';')
+            next(csvReader)
+            for row in csvReader:
+                if row:
+                    survey.add_item(row[0], category.name, informant_ids, row[1:])
+    return survey
+
+
+def survey_from_json(data):
+    '''Build a Survey from the data of all_informants_interlocutors.json (the item categories are unknown).'''
+    # The first key of every row is the label column (informant/interlocutor), the others are interview IDs.
+    survey = Survey(informant for row in data.values() for informant in list(row)[1:])
+
+    for label, row in data.items():
+        keys = list(row)[1:]
+        informant_ids = [survey.informant_index[informant] for informant in keys]
+        survey.add_item(label, None, informant_ids, [row[key] for key in keys])
+    return survey
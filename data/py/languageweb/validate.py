@@ -0,0 +1,163 @@
+'''
+Validation and normalisation of the category CSV files, the first stage of the pipeline.
+All files are checked before anything is converted or rendered, and every problem is reported at once:
+- the first column has the label header of the category and the interview IDs are unique and non-empty
+- all files have the same interview columns in the same order, and every row has one cell per column
+- the item labels are non-empty and unique across all categories (step 1 keys the rows by their label)
+- every language of an answer is known, i.e. has a color in languages_colors_links
+The answers are normalised to one spelling: the languages are stripped, inner whitespace is collapsed,
+the case is taken from the known language (turkish -> Turkish) and duplicates are dropped, so
+"Kurmanji,Şexbizinî ,German" becomes "Kurmanji, Şexbizinî, German". The normalised files are written as a
+canonical dataset, which the pipeline converts instead of the original files.
+Output: data/canonical/<category>.csv
+'''
+
+import csv
+import os
+import unicodedata
+
+from languageweb import instrument, paths
+from languageweb.categories import CATEGORIES, dataset_categories
+from languageweb.colors import languages_colors_links
+from languageweb.survey import split_answer
+
+
+class ValidationError(ValueError):
+    '''Raised with the list of all problems found in the CSV files.'''
+
+    def __init__(self, problems):
+        self.problems = problems
+        shown = problems[:20]
+        more = len(problems) - len(shown)
+        super().__init__(f'{len(problems)} problem(s) in the CSV files:\n' + '\n'.join(shown)
+                         + (f'\n... and {more} more' if more else ''))
+
+
+class Normaliser:
+    '''
+    Normalise answers, caching the result of every distinct answer string.
+    languages: the known language names
+    '''
+
+    def __init__(self, languages=None):
+        names = languages_colors_links if languages is None else languages
+        self.known = {name.casefold(): name for name in names}
+        self.answers = {}
+
+    def language(self, name):
+        '''Return the canonical spelling of a language, or None if it is unknown.'''
+        name = ' '.join(unicodedata.normalize('NFC', name).split())
+        return self.known.get(name.casefold())
+
+    def answer(self, value):
+        '''Return the canonical form of an answer and the list of its unknown languages.'''
+        result = self.answers.get(value)
+        if result is None:
+            languages = []
+            unknown = []
+            for name in split_answer(value):
+                language = self.language(name)
+                if language is None:
+                    unknown.append(name)
+                elif language not in languages:
+                    languages.append(language)
+            result = self.answers[value] = (', '.join(languages), unknown)
+        return result
+
+
+def read_table(csv_path):
+    with open(csv_path, encoding='utf-8-sig', newline='') as csvf:
+        return [row for row in csv.reader(csvf, delimiter=';') if row]
+
+
+def validate_dataset(categories=CATEGORIES, languages=None):
+    '''
+    Check and normalise the CSV files of the categories.
+    Returns the normalised rows of every file (dict category name -> rows, header first) and the number of
+    changed cells; raises ValidationError listing all problems.
+    '''
+    normaliser = Normaliser(languages)
+    problems = []
+    tables = {}
+    changed = 0
+    labels = {}
+    first_header = None
+
+    for category in categories:
+        name = os.path.basename(category.csv_path)
+        if not os.path.exists(category.csv_path):
+            problems.append(f'{name}: file not found')
+            continue
+        rows = read_table(category.csv_path)
+        if not rows:
+            problems.append(f'{name}: empty file')
+            continue
+
+        header = [cell.strip() for cell in rows[0]]
+        if header[0] != category.label_column:
+            problems.append(f'{name}: first column is "{header[0]}", expected "{category.label_column}"')
+        interviews = header[1:]
+        if any(not interview for interview in interviews):
+            problems.append(f'{name}: empty interview ID in the header')
+        duplicates = sorted({interview for interview in interviews if interviews.count(interview) > 1})
+        if duplicates:
+            problems.append(f'{name}: duplicate interview IDs ' + ', '.join(duplicates))
+        if first_header is None:
+            first_header = (name, interviews)
+        elif interviews != first_header[1]:
+            problems.append(f'{name}: the interview columns differ from those of {first_header[0]}')
+
+        table = [header]
+        for line, row in enumerate(rows[1:], start=2):
+            label = ' '.join(row[0].split())
+            if len(row) != len(header):
+                problems.append(f'{name}: line {line} ({label}) has {len(row)} columns, the header {len(header)}')
+            if not label:
+                problems.append(f'{name}: line {line} has no label')
+            elif label in labels:
+                problems.append(f'{name}: line {line}: label "{label}" is already used in {labels[label]}')
+            else:
+                labels[label] = name
+
+            cells = [label]
+            for interview, value in zip(interviews, row[1:]):
+                answer, unknown = normaliser.answer(value)
+                if unknown:
+                    problems.append(f'{name}: line {line} ({label}), interview {interview}: unknown language(s) '
+                                    + ', '.join(f'"{language}"' for language in unknown))
+                cells.append(answer)
+            changed += sum(a != b for a, b in zip(cells, row))
+            table.append(cells)
+        tables[category.name] = table
+
+    if problems:
+        raise ValidationError(problems)
+    return tables, changed
+
+
+def write_table(csv_path, rows):
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+        csv.writer(csvf, delimiter=';').writerows(rows)
+
+
+def build_canonical(categories=CATEGORIES, output_dir=paths.CANONICAL_CSV_DIR, languages=None):
+    '''Validate the CSV files and write the canonical dataset to output_dir; return the number of changed cells.'''
+    with instrument.stage('validate', 'check') as counts:
+        tables, changed = validate_dataset(categories, languages)
+        counts.update(files=len(tables), rows=sum(len(rows) - 1 for rows in tables.values()), changed=changed)
+
+    outputs = [os.path.join(output_dir, os.path.basename(category.csv_path)) for category in categories]
+    with instrument.stage('validate', 'write', outputs=outputs):
+        os.makedirs(output_dir, exist_ok=True)
+        for category, csv_path in zip(categories, outputs):
+            write_table(csv_path, tables[category.name])
+    return changed
+
+
+def canonical_dataset(categories=CATEGORIES, output_dir=paths.CANONICAL_CSV_DIR, languages=None):
+    '''
+    Validate the CSV files, write the canonical dataset to output_dir and return its categories, which the
+    steps read instead of the original files. Raises ValidationError.
+    '''
+    build_canonical(categories, output_dir, languages)
+    return dataset_categories(output_dir, categories)
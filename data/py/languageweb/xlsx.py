@@ -0,0 +1,177 @@
+'''
+Direct ingest of the Excel workbooks (data/xlsx/<category>.xlsx) into the category CSV files.
+The first sheet of every workbook is streamed row by row with openpyxl in read-only mode and written to
+the CSV file of its category in the format of the exports (UTF-8 with BOM, ';' delimiter), so the CSV
+files no longer have to be exported by hand. Per workbook and sheet the content hashes are recorded:
+- an unchanged workbook file is skipped without opening it
+- a sheet whose XML and shared strings did not change is skipped without parsing it
+- a parsed sheet whose cell values did not change (e.g. only the formatting did) leaves its CSV untouched
+On the first ingest of a workbook, a CSV file differing from it is kept: the CSV file wins until the
+workbook changes. A changed workbook whose CSV file was also edited since the last ingest is not written
+but reported as a conflict, unless force is given.
+Output: the CSV files of the categories, the hashes in data/.cache/xlsx_state.json (per workbook path)
+'''
+
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+
+from languageweb import instrument, paths
+from languageweb.categories import CATEGORIES
+from languageweb.dag import file_digest
+
+state_path = os.path.join(paths.CACHE_DIR, 'xlsx_state.json')
+
+NAMESPACES = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+
+class ExportConflict(ValueError):
+    '''Raised when CSV files were edited by hand and differ from their workbooks.'''
+
+
+def workbook_path(category, xlsx_dir=paths.XLSX_DIR):
+    '''Return the workbook of a category, e.g. data/xlsx/media.xlsx for data/csv/media.csv.'''
+    return os.path.join(xlsx_dir, os.path.splitext(os.path.basename(category.csv_path))[0] + '.xlsx')
+
+
+def cell_text(value):
+    '''Return a cell value as in the CSV exports: empty for None, 12 for 12.0.'''
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def first_sheet_digest(path):
+    '''
+    Return the name of the first sheet and a hash of its XML and of the shared strings (the cell texts),
+    read from the zip archive without parsing the sheet.
+    '''
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        sheet = workbook.find('main:sheets/main:sheet', NAMESPACES)
+        relation = sheet.get(f'{{{NAMESPACES["rel"]}}}id')
+        relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        target = next(r.get('Target') for r in relations.findall('pkg:Relationship', NAMESPACES) if r.get('Id') == relation)
+        member = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+        digest = hashlib.sha256(archive.read(member))
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            digest.update(archive.read('xl/sharedStrings.xml'))
+    return sheet.get('name'), digest.hexdigest()
+
+
+def stream_sheet(path, csv_path):
+    '''Stream the first sheet of a workbook into a CSV file; return the hash of the cell values and the rows.'''
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    digest = hashlib.sha256()
+    rows = 0
+    try:
+        with open(csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+            csvWriter = csv.writer(csvf, delimiter=';')
+            for values in workbook.worksheets[0].iter_rows(values_only=True):
+                row = [cell_text(value) for value in values]
+                digest.update(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+                csvWriter.writerow(row)
+                rows += 1
+    finally:
+        workbook.close()
+    return digest.hexdigest(), rows
+
+
+def load_state(path=state_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=state_path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
+
+
+def ingest_workbook(category, entry, xlsx_dir=paths.XLSX_DIR, force=False):
+    '''
+    Update the CSV file of a category from its workbook. entry is the recorded state of the workbook and
+    is updated in place. Returns skipped, unchanged, kept (first ingest, the CSV file differs), written or
+    conflict.
+    '''
+    path = workbook_path(category, xlsx_dir)
+    csv_digest = file_digest(category.csv_path)
+    first = not entry
+    # A CSV file differing from the last ingest was edited (or appended to) by hand.
+    edited = not first and csv_digest is not None and csv_digest != entry.get('csv')
+
+    workbook_digest = file_digest(path)
+    if not force and workbook_digest == entry.get('file'):
+        return 'skipped'
+    sheet, sheet_digest = first_sheet_digest(path)
+    if not force and sheet_digest == entry.get('sheet_digest'):
+        entry['file'] = workbook_digest
+        return 'skipped'
+
+    # Write to a temporary file, the CSV file is only replaced if its content changes.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(category.csv_path)), suffix='.tmp')
+    os.close(fd)
+    try:
+        content, rows = stream_sheet(path, tmp_path)
+        if file_digest(tmp_path) == csv_digest:
+            status = 'unchanged'
+        elif first and csv_digest is not None and not force:
+            status = 'kept'
+        elif edited and not force:
+            return 'conflict'
+        else:
+            os.replace(tmp_path, category.csv_path)
+            status = 'written'
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    entry.update(file=workbook_digest, sheet=sheet, sheet_digest=sheet_digest, content=content, rows=rows,
+                 csv=file_digest(category.csv_path))
+    return status
+
+
+def ingest(categories=CATEGORIES, xlsx_dir=paths.XLSX_DIR, force=False, force_option='--force', state_path=state_path,
+           log=print):
+    '''
+    Update the CSV files of the categories from their workbooks and return a dict category name -> status.
+    Raises ExportConflict if CSV files edited by hand differ from changed workbooks (the other CSV files are
+    updated anyway); force_option is the option of the caller passing force, named in the message.
+    '''
+    state = load_state(state_path)
+    results = {}
+    with instrument.stage('xlsx', 'ingest', outputs=[category.csv_path for category in categories]) as counts:
+        for category in categories:
+            path = workbook_path(category, xlsx_dir)
+            # The state is kept per workbook path, so workbooks of other directories do not share it.
+            entry = state.setdefault(os.path.realpath(path), {})
+            results[category.name] = ingest_workbook(category, entry, xlsx_dir, force)
+            log(f'{os.path.basename(path)}: {results[category.name]}')
+        save_state(state, state_path)
+        counts.update({status: list(results.values()).count(status) for status in set(results.values())})
+
+    conflicts = [name for name, status in results.items() if status == 'conflict']
+    if conflicts:
+        raise ExportConflict(
+            'CSV files edited since the last ingest differ from their changed workbooks: '
+            + ', '.join(os.path.basename(c.csv_path) for c in categories if c.name in conflicts)
+            + f' (update the workbooks, or overwrite the CSV files with {force_option})'
+        )
+    return results
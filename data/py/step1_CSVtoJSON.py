@@ -1,47 +1,33 @@
 '''
 Convert CSV files to a single JSON file.
+The conversion is implemented in languageweb/csvjson.py (also available as python -m languageweb json).
+The CSV files are validated and normalised first (languageweb/validate.py), the canonical dataset in
+data/canonical is converted.
 Input: Individual CSV files media, places, situations, interlocutors
 Output: JSON file with all the data
+Usage: python step1_CSVtoJSON.py [--compact] [--report [FILE]] [--profile] [--trace-memory]
 '''
 
-import csv
-import json
+import argparse
 
-csv_media = '../data/csv/media.csv'
-csv_places = '../data/csv/places.csv'
-csv_situations = '../data/csv/situations.csv'
-csv_interlocutors = '../data/csv/interlocutors.csv'
+from languageweb import instrument, paths
+from languageweb.csvjson import category_csv_files, csv_to_json
+from languageweb.validate import ValidationError, canonical_dataset
 
-json_all_data = '../data/json/all_informants_interlocutors.json'
+json_all_data = paths.JSON_ALL_DATA
 
-data = {}
 
-with open(csv_media, encoding='utf-8-sig') as csvf:
-    csvReader = csv.DictReader(csvf, delimiter=';')
-    for rows in csvReader:
-        key = rows['informant']
-        data[key] = rows
+def main(compact=False):
+    csv_to_json(category_csv_files(canonical_dataset()), json_all_data, compact=compact)
 
-with open(csv_places, encoding='utf-8-sig') as csvf:
-    csvReader = csv.DictReader(csvf, delimiter=';')
-    for rows in csvReader:
-        key = rows['informant']
-        data[key] = rows
-        data[key].update(rows)
 
-with open(csv_situations, encoding='utf-8-sig') as csvf:
-    csvReader = csv.DictReader(csvf, delimiter=';')
-    for rows in csvReader:
-        key = rows['informant']
-        data[key] = rows
-        data[key].update(rows)
-
-with open(csv_interlocutors, encoding='utf-8-sig') as csvf:
-    csvReader = csv.DictReader(csvf, delimiter=';')
-    for rows in csvReader:
-        key = rows['interlocutor']
-        data[key] = rows
-        data[key].update(rows)
-
-with open(json_all_data, 'w', encoding='utf-8') as jsonf:
-    jsonf.write(json.dumps(data, ensure_ascii=False, indent=4))
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the survey CSV files to one JSON file.')
+    parser.add_argument('--compact', action='store_true', help='write the JSON without indentation')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.configure(args)
+    try:
+        main(compact=args.compact)
+    except ValidationError as e:
+        parser.exit(1, f'{e}\n')
@@ -0,0 +1,8 @@
+'''
+The tests import the languageweb package from data/py; run them from there with python -m pytest tests.
+'''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
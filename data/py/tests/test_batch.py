@@ -0,0 +1,36 @@
+'''
+Batch builds validate the CSV files of a dataset and build from the normalised files (languageweb/batch.py).
+'''
+
+import os
+import shutil
+
+from languageweb import paths
+from languageweb.batch import Dataset, build_dataset
+from languageweb.validate import read_table, write_table
+
+
+def copy_dataset(directory, replace):
+    '''Copy the CSV files of the survey to directory/csv, replacing the answer of interview 1 in media.csv.'''
+    shutil.copytree(paths.CSV_DIR, str(directory / 'csv'))
+    media = str(directory / 'csv' / 'media.csv')
+    rows = read_table(media)
+    rows[1][1] = replace
+    write_table(media, rows)
+    return Dataset(str(directory), str(directory / 'output'))
+
+
+def test_normalised_dataset_is_built(tmp_path):
+    dataset = copy_dataset(tmp_path, 'turkish,  kurmanji')
+    result = build_dataset(dataset)
+    assert result['ok'], result.get('error')
+    assert read_table(os.path.join(dataset.canonical_dir, 'media.csv'))[1][1] == 'Turkish, Kurmanji'
+    assert os.path.exists(dataset.sankey_html)
+
+
+def test_invalid_dataset_fails_before_rendering(tmp_path):
+    dataset = copy_dataset(tmp_path, 'German French')
+    result = build_dataset(dataset)
+    assert not result['ok']
+    assert result['error'].startswith('ValidationError')
+    assert not os.path.exists(dataset.network_html)
@@ -0,0 +1,47 @@
+'''
+Step 1: the streamed JSON has to be byte-identical to json.dumps of the whole dict.
+'''
+
+import csv
+import io
+import json
+
+import pytest
+
+from languageweb.csvjson import category_csv_files, csv_to_json, write_json
+from languageweb.validate import canonical_dataset
+
+VALUES = [
+    ('partner', {'1': 'Kurmanji, Turkish', '2': '', '3': 'Şexbizinî'}),
+    ('empty', {}),
+    ('nested', {'list': [1, 2.5, None, True], 'dict': {'a': {'b': []}}, 'quote': 'say "hi"\n'}),
+    ('zahl', 12),
+]
+
+
+@pytest.mark.parametrize('rows', [[], VALUES[:1], VALUES])
+def test_write_json_indented(rows):
+    jsonf = io.StringIO()
+    assert write_json(iter(rows), jsonf) == len(rows)
+    assert jsonf.getvalue() == json.dumps(dict(rows), ensure_ascii=False, indent=4)
+
+
+@pytest.mark.parametrize('rows', [[], VALUES])
+def test_write_json_compact(rows):
+    jsonf = io.StringIO()
+    write_json(iter(rows), jsonf, indent=None)
+    assert jsonf.getvalue() == json.dumps(dict(rows), ensure_ascii=False, separators=(',', ':'))
+
+
+def test_csv_to_json_matches_dict_of_csv_rows(tmp_path):
+    # The canonical dataset, as built: its labels are unique, so the keys of the JSON file are too.
+    csv_files = category_csv_files(canonical_dataset(output_dir=str(tmp_path / 'canonical')))
+    json_path = tmp_path / 'all.json'
+    csv_to_json(csv_files, str(json_path))
+
+    data = {}
+    for csv_path, label_column in csv_files:
+        with open(csv_path, encoding='utf-8-sig') as csvf:
+            for row in csv.DictReader(csvf, delimiter=';'):
+                data[row[label_column]] = row
+    assert json_path.read_text(encoding='utf-8') == json.dumps(data, ensure_ascii=False, indent=4)
@@ -0,0 +1,92 @@
+'''
+Incremental build (languageweb/dag.py): unchanged stages are skipped, changed inputs rebuild the stages
+downstream of them only, and overwritten or deleted outputs are rebuilt.
+'''
+
+import os
+
+import pytest
+
+from languageweb import dag, paths, pipeline
+
+
+@pytest.fixture
+def build(tmp_path):
+    '''Return a function running a pipeline source -> upper -> (count, copy) and recording the runs.'''
+    source = tmp_path / 'source.txt'
+    source.write_text('a b c', encoding='utf-8')
+    other = tmp_path / 'other.txt'
+    other.write_text('x', encoding='utf-8')
+    upper = tmp_path / 'upper.txt'
+    count = tmp_path / 'count.txt'
+    copy = tmp_path / 'copy.txt'
+    runs = []
+
+    def step(name, function):
+        def run():
+            runs.append(name)
+            function()
+        return run
+
+    stages = [
+        dag.Stage('upper', step('upper', lambda: upper.write_text(source.read_text(encoding='utf-8').upper(),
+                                                                  encoding='utf-8')),
+                  inputs=[source], outputs=[upper]),
+        dag.Stage('count', step('count', lambda: count.write_text(str(len(upper.read_text(encoding='utf-8').split())),
+                                                                  encoding='utf-8')),
+                  inputs=[upper], outputs=[count], deps=['upper']),
+        dag.Stage('copy', step('copy', lambda: copy.write_text(other.read_text(encoding='utf-8'), encoding='utf-8')),
+                  inputs=[other], outputs=[copy]),
+    ]
+
+    def run(**options):
+        runs.clear()
+        dag.run(stages, str(tmp_path / 'state.json'), log=lambda message: None, **options)
+        return sorted(runs)
+
+    run.paths = {'source': source, 'other': other, 'upper': upper, 'count': count, 'copy': copy}
+    return run
+
+
+def test_unchanged_build_is_skipped(build):
+    assert build() == ['copy', 'count', 'upper']
+    assert build() == []
+    assert build(force=True) == ['copy', 'count', 'upper']
+
+
+def test_changed_input_rebuilds_downstream_stages_only(build):
+    build()
+    build.paths['source'].write_text('a b c d', encoding='utf-8')
+    assert build() == ['count', 'upper']
+    assert build.paths['count'].read_text(encoding='utf-8') == '4'
+    # An input rewritten with the same content changes nothing.
+    build.paths['other'].write_text('x', encoding='utf-8')
+    assert build() == []
+
+
+def test_params_are_part_of_the_fingerprint(tmp_path):
+    runs = []
+    state_path = str(tmp_path / 'state.json')
+    for params, expected in [({'color': 'red'}, 1), ({'color': 'red'}, 1), ({'color': 'blue'}, 2)]:
+        dag.run([dag.Stage('page', lambda: runs.append(1), params=params)], state_path, log=lambda message: None)
+        assert len(runs) == expected
+
+
+@pytest.mark.parametrize('change', ['overwrite', 'delete'])
+def test_changed_output_is_rebuilt(build, change):
+    build()
+    upper = build.paths['upper']
+    if change == 'overwrite':
+        upper.write_text('edited', encoding='utf-8')
+    else:
+        upper.unlink()
+    # The stage writing the output runs again; its rebuilt output equals the recorded one, so count is skipped.
+    assert build() == ['upper']
+    assert upper.read_text(encoding='utf-8') == 'A B C'
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_lazy_sankey_files_are_outputs(lazy):
+    step4 = [stage for stage in pipeline.create_stages(lazy=lazy) if stage.name == 'step4'][0]
+    sankey_files = [path for path in step4.outputs if os.path.dirname(path) == paths.JSON_SANKEY_DIR]
+    assert len(sankey_files) == (len(pipeline.canonical_categories) if lazy else 0)
@@ -0,0 +1,117 @@
+'''
+Delta mode: appending an informant has to write the same files as a forced full rebuild, since the
+incremental build records the patched outputs as up to date (languageweb/delta.py).
+The pipeline runs on a copy of the repository in a temporary directory.
+'''
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+OUTPUTS = [
+    'data/csv/media.csv',
+    'data/csv/interlocutors.csv',
+    'data/canonical/media.csv',
+    'data/json/all_informants_interlocutors.json',
+    'data/json/nodes_links.json',
+    'data/json/sankey_flows.json',
+    'data/statistics/statistics.json',
+    'data/statistics/language_item.csv',
+    'data/statistics/informant_language.csv',
+    'data/statistics/category_language.csv',
+    'network.html',
+    'sankey.html',
+]
+
+UUID = re.compile(rb'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+ANSWERS = {
+    'normal': {'partner': 'Kurmanji, Turkish', 'at the bank': 'German', 'instagram': 'Turkish'},
+    # Dutch becomes more frequent than French, so the language order of the statistics and flows changes.
+    'language moved ahead': {label: 'dutch ,  turkish' for label in [
+        'partner', 'children', 'mother', 'father', 'siblings', 'at the bank', 'instagram', 'jokes', 'songs',
+    ]},
+    'empty': {},
+}
+
+
+def copy_repository(target):
+    ignore = shutil.ignore_patterns('__pycache__', '.cache', 'canonical', 'statistics', 'lib', 'tests', '*.gz', '*.br')
+    os.makedirs(os.path.join(target, 'data'))
+    shutil.copytree(os.path.join(ROOT, 'data', 'csv'), os.path.join(target, 'data', 'csv'))
+    shutil.copytree(os.path.join(ROOT, 'data', 'json'), os.path.join(target, 'data', 'json'), ignore=ignore)
+    shutil.copytree(os.path.join(ROOT, 'data', 'py'), os.path.join(target, 'data', 'py'), ignore=ignore)
+
+
+def languageweb(root, *args):
+    result = subprocess.run([sys.executable, '-m', 'languageweb', *args], cwd=os.path.join(root, 'data', 'py'),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def read_output(root, name):
+    with open(os.path.join(root, name), 'rb') as f:
+        return UUID.sub(b'UUID', f.read())
+
+
+@pytest.fixture(scope='module')
+def built(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp('built') / 'repository')
+    copy_repository(root)
+    languageweb(root, 'build')
+    return root
+
+
+@pytest.mark.parametrize('case', list(ANSWERS))
+def test_append_equals_forced_rebuild(built, tmp_path, case):
+    appended = str(tmp_path / 'appended')
+    shutil.copytree(built, appended)
+    answers_path = str(tmp_path / 'answers.json')
+    with open(answers_path, 'w', encoding='utf-8') as f:
+        json.dump(ANSWERS[case], f)
+    assert 'Appended interview' in languageweb(appended, 'append', answers_path)
+
+    # The incremental build takes the patched outputs as up to date.
+    log = languageweb(appended, 'build', 'validate', 'step1', 'step2', 'step3', 'step4', 'statistics')
+    assert 'building' not in log
+
+    rebuilt = str(tmp_path / 'rebuilt')
+    shutil.copytree(appended, rebuilt)
+    languageweb(rebuilt, 'build', '--force')
+    for name in OUTPUTS:
+        assert read_output(appended, name) == read_output(rebuilt, name), name
+
+
+def test_append_builds_pending_changes_first(built, tmp_path):
+    appended = str(tmp_path / 'appended')
+    shutil.copytree(built, appended)
+    # A CSV file edited since the last build: the append must not record the old outputs as up to date.
+    media_path = os.path.join(appended, 'data', 'csv', 'media.csv')
+    with open(media_path, encoding='utf-8-sig', newline='') as f:
+        media = f.read()
+    with open(media_path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(media.replace('youtube;', 'YouTubeX;', 1))
+    answers_path = str(tmp_path / 'answers.json')
+    with open(answers_path, 'w', encoding='utf-8') as f:
+        json.dump({'YouTubeX': 'Turkish', 'partner': 'Kurmanji'}, f)
+    languageweb(appended, 'append', answers_path)
+
+    for name in ['data/canonical/media.csv', 'data/json/all_informants_interlocutors.json',
+                 'data/json/nodes_links.json', 'data/json/sankey_flows.json', 'sankey.html']:
+        assert b'YouTubeX' in read_output(appended, name), name
+    log = languageweb(appended, 'build', 'validate', 'step1', 'step2', 'step3', 'step4', 'statistics')
+    assert 'building' not in log
+
+    rebuilt = str(tmp_path / 'rebuilt')
+    shutil.copytree(appended, rebuilt)
+    languageweb(rebuilt, 'build', '--force')
+    for name in OUTPUTS:
+        assert read_output(appended, name) == read_output(rebuilt, name), name
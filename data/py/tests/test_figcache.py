@@ -0,0 +1,34 @@
+'''
+Figure cache (languageweb/figcache.py): the keys of the cached figures change with the code rendering them.
+'''
+
+from languageweb import network_page, sankey
+from languageweb.categories import CATEGORIES
+from languageweb.figcache import FigureCache, source_token
+
+FLOWS = {'label': ['Kurmanji', 'partner'], 'source': [0], 'target': [1], 'value': [3], 'link_language': ['Kurmanji']}
+
+
+def test_source_token_follows_the_file(tmp_path):
+    first, second = tmp_path / 'first.py', tmp_path / 'second.py'
+    first.write_text('def create_figure(): pass\n', encoding='utf-8')
+    second.write_text('def create_figure(): return 1\n', encoding='utf-8')
+    assert source_token(str(first)) != source_token(str(second))
+    assert source_token(sankey.__file__) == source_token(sankey.__file__)
+
+
+def test_keys_include_the_rendering_code(monkeypatch):
+    sankey_key = sankey.figure_key(CATEGORIES[0], FLOWS, sankey.render_figure)
+    network_key = network_page.network_key([], [], False, False)
+    monkeypatch.setattr(sankey, 'source_token', lambda path: 'edited')
+    monkeypatch.setattr(network_page, 'source_token', lambda path: 'edited')
+    assert sankey.figure_key(CATEGORIES[0], FLOWS, sankey.render_figure) != sankey_key
+    assert network_page.network_key([], [], False, False) != network_key
+
+
+def test_get_or_render(tmp_path):
+    cache = FigureCache(str(tmp_path))
+    renders = []
+    for _ in range(2):
+        assert cache.get_or_render('key', lambda: renders.append(1) or '<div></div>') == '<div></div>'
+    assert renders == [1]
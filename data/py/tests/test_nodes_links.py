@@ -0,0 +1,45 @@
+'''
+Step 2: the npz and columnar forms of the nodes and links convert back to the identical nodes_links.json.
+'''
+
+import pytest
+
+from languageweb.csvjson import category_csv_files, csv_to_json
+from languageweb.nodes_links import build_nodes_links, convert_nodes_links, read_nodes_links, write_nodes_links
+from languageweb.validate import canonical_dataset
+
+SMALL = {
+    'nodes': [{'id': 'partner', 'type': 'interlocutor', 'color': '#ffc107'},
+              {'id': 'Şexbizinî', 'type': 'language', 'color': ''}],
+    'links': [{'interview': '12', 'source': 'partner', 'target': 'Şexbizinî'}],
+}
+
+
+@pytest.fixture(scope='module')
+def nodes_links(tmp_path_factory):
+    '''Build nodes_links.json of the survey.'''
+    directory = tmp_path_factory.mktemp('step2')
+    categories = canonical_dataset(output_dir=str(directory / 'canonical'))
+    csv_to_json(category_csv_files(categories), str(directory / 'all.json'))
+    build_nodes_links(str(directory / 'all.json'), str(directory / 'nodes_links.json'), categories)
+    return directory / 'nodes_links.json'
+
+
+@pytest.mark.parametrize('name', ['nodes_links.columnar.json', 'nodes_links.npz'])
+def test_round_trip_is_byte_identical(nodes_links, tmp_path, name):
+    if name.endswith('.npz'):
+        pytest.importorskip('numpy')
+    converted = str(tmp_path / name)
+    convert_nodes_links(str(nodes_links), converted)
+    convert_nodes_links(converted, str(tmp_path / 'nodes_links.json'))
+    assert (tmp_path / 'nodes_links.json').read_bytes() == nodes_links.read_bytes()
+
+
+@pytest.mark.parametrize('name', ['small.columnar.json', 'small.npz'])
+@pytest.mark.parametrize('data', [SMALL, {'nodes': [], 'links': []}])
+def test_formats_read_back_equal(tmp_path, name, data):
+    if name.endswith('.npz'):
+        pytest.importorskip('numpy')
+    path = str(tmp_path / name)
+    write_nodes_links(data, path)
+    assert read_nodes_links(path) == data
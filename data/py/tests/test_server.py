@@ -0,0 +1,141 @@
+'''
+Query server (languageweb/server.py): queries agree with the built files, responses are cached and revalidated,
+errors are answered, and request bodies do not break keep-alive connections.
+'''
+
+import asyncio
+import json
+import os
+import shutil
+
+import pytest
+
+from languageweb import paths
+from languageweb.batch import Dataset, build_dataset
+from languageweb.server import Model, QueryError, Server
+from languageweb.stats import build_statistics
+
+
+class FakeModel:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, path, params):
+        self.queries.append(path)
+        if path == '/broken':
+            raise KeyError('oops')
+        if path == '/missing':
+            raise QueryError(404, 'unknown query')
+        return {'path': path, 'params': params}
+
+
+@pytest.fixture(scope='module')
+def built(tmp_path_factory):
+    '''Build nodes_links.json, sankey_flows.json and statistics.json of the survey; return their paths.'''
+    directory = tmp_path_factory.mktemp('survey')
+    shutil.copytree(paths.CSV_DIR, str(directory / 'csv'))
+    dataset = Dataset(str(directory), str(directory / 'output'))
+    result = build_dataset(dataset)
+    assert result['ok'], result.get('error')
+    statistics_dir = str(directory / 'output' / 'statistics')
+    build_statistics(dataset.canonical_categories, statistics_dir)
+    return dataset.nodes_links, dataset.sankey_flows, os.path.join(statistics_dir, 'statistics.json')
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_queries_of_built_files(built):
+    nodes_links_path, flows_path, statistics_path = built
+    model = Model(nodes_links_path, flows_path, statistics_path)
+    network = read_json(nodes_links_path)
+    flows = read_json(flows_path)
+    statistics = read_json(statistics_path)
+
+    result = model.query('/nodes-links', {'language': ['Kurmanji'], 'type': ['media']})
+    media = {node['id'] for node in network['nodes'] if node['type'] == 'media'}
+    expected = [link for link in network['links'] if link['target'] == 'Kurmanji' and link['source'] in media]
+    assert expected and result['links'] == expected
+    assert {node['id'] for node in result['nodes']} == media.intersection(l['source'] for l in expected) | {'Kurmanji'}
+
+    assert model.query('/flows', {}) == flows
+    assert model.query('/flows', {'category': ['media']}) == {'media': flows['media']}
+    assert model.query('/statistics', {}) == statistics
+    assert model.query('/statistics', {'part': ['language_item'], 'key': ['partner']}) == {
+        'partner': statistics['language_item']['partner']}
+    with pytest.raises(QueryError):
+        model.query('/statistics', {'part': ['language_item'], 'key': ['no such item']})
+
+
+def test_query_errors(tmp_path):
+    server = Server(FakeModel(), root=str(tmp_path))
+    status, headers, body = server.handle('GET', '/api/broken', {})
+    assert status == 500
+    assert json.loads(body) == {'error': "KeyError: 'oops'"}
+    assert server.handle('GET', '/api/missing', {})[0] == 404
+    assert server.handle('POST', '/api/nodes-links', {})[0] == 405
+
+
+def test_not_modified(tmp_path):
+    (tmp_path / 'index.html').write_bytes(b'<html></html>')
+    server = Server(FakeModel(), root=str(tmp_path))
+    for target in ['/api/flows?category=media', '/index.html']:
+        status, headers, body = server.handle('GET', target, {})
+        assert status == 200 and body
+        etag = headers['ETag']
+        status, headers, body = server.handle('GET', target, {'if-none-match': '"other", ' + etag})
+        assert (status, headers['ETag'], body) == (304, etag, b'')
+        assert server.handle('GET', target, {'if-none-match': '"other"'})[0] == 200
+
+
+def test_response_cache_evicts_least_recently_used():
+    model = FakeModel()
+    server = Server(model, cache_size=2)
+    for target in ['/api/a', '/api/b', '/api/a', '/api/c', '/api/a', '/api/b']:
+        assert server.handle('GET', target, {})[0] == 200
+    # /a is kept as the most recently used entry when /c is added, /b is evicted and computed again.
+    assert model.queries == ['/a', '/b', '/c', '/b']
+    # Equal queries share an entry regardless of the order of their parameters.
+    server.handle('GET', '/api/b?x=1&y=2', {})
+    server.handle('GET', '/api/b?y=2&x=1', {})
+    assert model.queries[-1:] == ['/b'] and len(model.queries) == 5
+
+
+def exchange(requests):
+    '''Send the raw requests over one connection and return the raw responses.'''
+
+    async def run():
+        server = await asyncio.start_server(Server(FakeModel()).connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(requests)
+        await writer.drain()
+        responses = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_body_of_rejected_request_is_skipped():
+    responses = exchange(
+        b'POST /api/flows HTTP/1.1\r\nContent-Length: 11\r\n\r\n{"a": "b"}\n'
+        b'GET /api/flows?category=media HTTP/1.1\r\nConnection: close\r\n\r\n'
+    )
+    assert responses.startswith(b'HTTP/1.1 405 ')
+    assert b'HTTP/1.1 200 OK' in responses
+    assert responses.endswith(b'{"path":"/flows","params":{"category":["media"]}}')
+
+
+def test_connection_is_closed_after_unread_body():
+    responses = exchange(
+        b'POST /api/flows HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n'
+        b'GET /api/flows HTTP/1.1\r\n\r\n'
+    )
+    assert responses.startswith(b'HTTP/1.1 405 ')
+    assert b'Connection: close' in responses
+    assert b'200 OK' not in responses
@@ -0,0 +1,30 @@
+'''
+Neighbour index (languageweb/similarity.py): the top-k informants equal a full stable sort, ties by index.
+'''
+
+import pytest
+
+from languageweb.similarity import similarity_blocks, top_k
+
+
+def reference(matrix, k, metric):
+    '''Sort all informants of every row by similarity, ties by index.'''
+    rows = []
+    for start, block in similarity_blocks(matrix, metric):
+        for i, row in enumerate(block.tolist()):
+            others = [j for j in range(len(row)) if j != start + i]
+            rows.append(sorted(others, key=lambda j: (-row[j], j))[:k])
+    return rows
+
+
+@pytest.mark.parametrize('metric', ['jaccard', 'cosine'])
+@pytest.mark.parametrize('k', [1, 3, 7])
+def test_top_k_ties_by_index(metric, k):
+    np = pytest.importorskip('numpy')
+    # Few distinct profiles, so most similarities are tied; the last informant answered nothing.
+    profiles = np.array([[1, 0, 1], [1, 1, 0], [0, 0, 1]], dtype=np.float32)
+    matrix = np.vstack([profiles[[i % 3 for i in range(10)]], np.zeros((1, 3), dtype=np.float32)])
+    # Small blocks, so the rows are spread over several blocks.
+    indices, scores = top_k(matrix, k, metric, block_bytes=4 * 11 * 3)
+    assert indices.tolist() == reference(matrix, k, metric)
+    assert (scores[:, :-1] >= scores[:, 1:]).all()
@@ -0,0 +1,88 @@
+'''
+Survey matrix (languageweb/survey.py) and Sankey flows (languageweb/flows.py): the answer bitmasks hold
+the same languages as the answer strings, and the flows keep the item as target where the original
+step 4, taking the only token of a row counted once as its label, did not.
+'''
+
+import csv
+from collections import Counter
+
+import pytest
+
+from languageweb.categories import dataset_categories
+from languageweb.flows import category_flows
+from languageweb.survey import load_survey, split_answer
+
+ROWS = [
+    ['interlocutor', '1', '2', '3', '4'],
+    ['partner', 'Kurmanji, Turkish', 'Turkish', '', 'Kurmanji,Turkish'],
+    # French is used by a single informant, and the label contains a comma.
+    ['sister, brother', 'Turkish', 'French', 'Turkish, German', ''],
+    ['children', '', '', '', ''],
+    ['mother', 'Şexbizinî , Kurmanji', 'Kurmanji', 'Kurmanji', 'Other language'],
+]
+
+
+@pytest.fixture
+def survey(tmp_path):
+    category = [c for c in dataset_categories(str(tmp_path)) if c.name == 'interlocutors'][0]
+    with open(category.csv_path, 'w', encoding='utf-8-sig', newline='') as csvf:
+        csv.writer(csvf, delimiter=';').writerows(ROWS)
+    return load_survey([category])
+
+
+def baseline_flows(rows):
+    '''The flows of the original step 4: the label of a row is its first token counted once (value == 1).'''
+    data = {'source': [], 'target': [], 'value': []}
+    for row in rows[1:]:
+        cleaned_row = []
+        for r in row:
+            if ',' in r:
+                cleaned_row.extend(lang.strip() for lang in r.split(','))
+            else:
+                cleaned_row.append(r.strip())
+        counter = Counter(cleaned_row)
+        target = [key for key, value in counter.items() if value == 1][0]
+        for source, value in counter.items():
+            if source != target:
+                data['source'].append(source)
+                data['target'].append(target)
+                data['value'].append(value)
+    return data
+
+
+def test_answer_masks_equal_answer_matrix(survey):
+    assert survey.informants == ROWS[0][1:]
+    assert survey.items == [row[0] for row in ROWS[1:]]
+    for item, row in enumerate(ROWS[1:]):
+        for informant, value in enumerate(row[1:]):
+            languages = {survey.languages[lang] for lang in survey.mask_languages(survey.answers[item][informant])}
+            assert languages == set(split_answer(value)), (row[0], informant)
+        expected = Counter(lang for value in row[1:] for lang in set(split_answer(value)))
+        assert {survey.languages[lang]: count for lang, count in survey.counts(item).items()} == expected
+
+
+def test_answer_array_equals_answer_matrix(survey):
+    pytest.importorskip('numpy')
+    array = survey.to_array()
+    assert array.shape == (4, 4, len(survey.languages))
+    for item, row in enumerate(ROWS[1:]):
+        for informant, value in enumerate(row[1:]):
+            assert {survey.languages[lang] for lang in array[informant, item].nonzero()[0]} == set(split_answer(value))
+
+
+def test_flows_keep_the_item_as_target(survey):
+    flows = category_flows(survey, 'interlocutors')
+    links = {(flows['label'][source], flows['label'][target]): value
+             for source, target, value in zip(flows['source'], flows['target'], flows['value'])}
+    assert links == {
+        ('Kurmanji', 'partner'): 2, ('Turkish', 'partner'): 3,
+        ('Turkish', 'sister, brother'): 2, ('French', 'sister, brother'): 1, ('German', 'sister, brother'): 1,
+        ('Kurmanji', 'mother'): 3, ('Şexbizinî', 'mother'): 1, ('Other language', 'mother'): 1,
+    }
+    assert 'children' in flows['label']
+
+    # The original step 4 took "sister" as the target and counted "brother" and empty answers as languages.
+    baseline = baseline_flows(ROWS)
+    assert 'sister, brother' not in baseline['target'] and 'brother' in baseline['source']
+    assert '' in baseline['source']
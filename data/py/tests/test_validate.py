@@ -0,0 +1,88 @@
+'''
+Validation and normalisation of the category CSV files (languageweb/validate.py).
+'''
+
+import pytest
+
+from languageweb.categories import dataset_categories
+from languageweb.validate import Normaliser, ValidationError, build_canonical, read_table, validate_dataset, write_table
+
+LANGUAGES = ['Kurmanji', 'Turkish', 'German', 'No language given']
+
+VALID = {
+    'interlocutors.csv': [['interlocutor', '1', '2'], ['partner', 'Kurmanji', 'Turkish'], ['mother', '', 'Kurmanji']],
+    'places.csv': [['informant', '1', '2'], ['at home', 'Kurmanji', 'German'], ['at work', '', '']],
+    'situations.csv': [['informant', '1', '2'], ['dreaming', 'Kurmanji', 'Turkish']],
+    'media.csv': [['informant', '1', '2'], ['instagram', 'Turkish', 'No language given']],
+}
+
+
+def write_dataset(directory, **changes):
+    '''Write the valid dataset with the tables of changes (file name without .csv -> rows) replaced.'''
+    for name, rows in VALID.items():
+        write_table(str(directory / name), changes.get(name[:-4], rows))
+    return dataset_categories(str(directory))
+
+
+def problems(directory, **changes):
+    with pytest.raises(ValidationError) as error:
+        validate_dataset(write_dataset(directory, **changes), LANGUAGES)
+    return error.value.problems
+
+
+def test_valid_dataset(tmp_path):
+    tables, changed = validate_dataset(write_dataset(tmp_path), LANGUAGES)
+    assert changed == 0
+    assert tables['interlocutors'] == VALID['interlocutors.csv']
+
+
+def test_answers_are_normalised(tmp_path):
+    categories = write_dataset(tmp_path, media=[
+        ['informant', '1', '2'], ['instagram', 'kurmanji,Turkish ,  kurmanji', '  turkish'],
+    ])
+    tables, changed = validate_dataset(categories, LANGUAGES)
+    assert tables['media'][1] == ['instagram', 'Kurmanji, Turkish', 'Turkish']
+    assert changed == 2
+
+    output_dir = tmp_path / 'canonical'
+    assert build_canonical(categories, str(output_dir), LANGUAGES) == 2
+    assert read_table(str(output_dir / 'media.csv'))[1] == ['instagram', 'Kurmanji, Turkish', 'Turkish']
+
+
+def test_unknown_languages(tmp_path):
+    found = problems(tmp_path, media=[['informant', '1', '2'], ['instagram', 'Kurmaji', 'German French']])
+    assert found == [
+        'media.csv: line 2 (instagram), interview 1: unknown language(s) "Kurmaji"',
+        'media.csv: line 2 (instagram), interview 2: unknown language(s) "German French"',
+    ]
+
+
+def test_all_problems_are_reported_at_once(tmp_path):
+    found = problems(
+        tmp_path,
+        interlocutors=[['person', '1', '2'], ['partner', 'Kurmanji', 'Turkish'], ['', 'Kurmanji', '']],
+        places=[['informant', '2', '2'], ['at home', 'Kurmanji'], ['partner', '', '']],
+    )
+    assert found == [
+        'interlocutors.csv: first column is "person", expected "interlocutor"',
+        'interlocutors.csv: line 3 has no label',
+        'places.csv: duplicate interview IDs 2',
+        'places.csv: the interview columns differ from those of interlocutors.csv',
+        'places.csv: line 2 (at home) has 2 columns, the header 3',
+        'places.csv: line 3: label "partner" is already used in interlocutors.csv',
+    ]
+
+
+def test_missing_file(tmp_path):
+    categories = write_dataset(tmp_path)
+    (tmp_path / 'situations.csv').unlink()
+    with pytest.raises(ValidationError) as error:
+        validate_dataset(categories, LANGUAGES)
+    assert error.value.problems == ['situations.csv: file not found']
+    assert str(error.value).startswith('1 problem(s) in the CSV files:')
+
+
+def test_normaliser_keeps_the_first_spelling():
+    normaliser = Normaliser(LANGUAGES)
+    assert normaliser.answer('turkish, TURKISH,  no  language given') == ('Turkish, No language given', [])
+    assert normaliser.answer('Arabic') == ('', ['Arabic'])
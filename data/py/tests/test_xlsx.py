@@ -0,0 +1,112 @@
+'''
+Ingest of the workbooks into the CSV files (languageweb/xlsx.py): skipping, export, conflicts and force.
+'''
+
+import zipfile
+
+import pytest
+
+from languageweb import xlsx
+from languageweb.categories import dataset_categories
+
+ROWS = [['informant', 1, 2], ['at home', 'Kurmanji', None], ['at work', 'Turkish, German', 'German']]
+CSV = '\ufeffinformant;1;2\r\nat home;Kurmanji;\r\nat work;Turkish, German;German\r\n'
+
+
+def write_workbook(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(str(path))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    '''Return the ingest arguments of a dataset with the workbook of places and no CSV file yet.'''
+    (tmp_path / 'xlsx').mkdir()
+    (tmp_path / 'csv').mkdir()
+    write_workbook(tmp_path / 'xlsx' / 'places.xlsx', ROWS)
+    categories = [c for c in dataset_categories(str(tmp_path / 'csv')) if c.name == 'places']
+    return {'categories': categories, 'xlsx_dir': str(tmp_path / 'xlsx'),
+            'state_path': str(tmp_path / 'state.json'), 'log': lambda message: None}
+
+
+def csv_text(dataset):
+    with open(dataset['categories'][0].csv_path, encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def no_parsing(monkeypatch):
+    def fail(*args):
+        raise AssertionError('the sheet was parsed')
+
+    monkeypatch.setattr(xlsx, 'stream_sheet', fail)
+
+
+def test_export_and_skip(dataset, monkeypatch):
+    assert xlsx.ingest(**dataset) == {'places': 'written'}
+    assert csv_text(dataset) == CSV
+    no_parsing(monkeypatch)
+    assert xlsx.ingest(**dataset) == {'places': 'skipped'}
+
+
+def test_unchanged_sheet_is_not_parsed(dataset, monkeypatch):
+    xlsx.ingest(**dataset)
+    # Repack the workbook: the file changes, the sheet and the shared strings do not.
+    path = dataset['xlsx_dir'] + '/places.xlsx'
+    with zipfile.ZipFile(path) as archive:
+        members = [(info, archive.read(info)) for info in archive.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+        for info, data in members:
+            archive.writestr(info.filename, data)
+    no_parsing(monkeypatch)
+    assert xlsx.ingest(**dataset) == {'places': 'skipped'}
+
+
+def test_changed_sheet_is_written(dataset):
+    xlsx.ingest(**dataset)
+    write_workbook(dataset['xlsx_dir'] + '/places.xlsx', ROWS[:2])
+    assert xlsx.ingest(**dataset) == {'places': 'written'}
+    assert csv_text(dataset) == '\ufeffinformant;1;2\r\nat home;Kurmanji;\r\n'
+
+
+def test_csv_wins_on_first_ingest_until_the_workbook_changes(dataset):
+    with open(dataset['categories'][0].csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('informant;1;2\r\nat home;Kurmanji, German;\r\n')
+    assert xlsx.ingest(**dataset) == {'places': 'kept'}
+    assert 'Kurmanji, German' in csv_text(dataset)
+    write_workbook(dataset['xlsx_dir'] + '/places.xlsx', ROWS + [['on holiday', 'German', 'German']])
+    assert xlsx.ingest(**dataset) == {'places': 'written'}
+    assert 'on holiday' in csv_text(dataset)
+
+
+def test_conflict_and_force(dataset):
+    xlsx.ingest(**dataset)
+    edited = CSV.replace('German;German', 'German;Dutch')
+    with open(dataset['categories'][0].csv_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(edited)
+    # An edited CSV file is kept as long as its workbook does not change.
+    assert xlsx.ingest(**dataset) == {'places': 'skipped'}
+
+    write_workbook(dataset['xlsx_dir'] + '/places.xlsx', ROWS[:2])
+    with pytest.raises(xlsx.ExportConflict, match='places.csv .*with --force\\)'):
+        xlsx.ingest(**dataset)
+    with pytest.raises(xlsx.ExportConflict, match='with --force-xlsx\\)'):
+        xlsx.ingest(force_option='--force-xlsx', **dataset)
+    assert csv_text(dataset) == edited
+
+    assert xlsx.ingest(force=True, **dataset) == {'places': 'written'}
+    assert csv_text(dataset) == '\ufeffinformant;1;2\r\nat home;Kurmanji;\r\n'
+
+
+def test_state_is_kept_per_workbook_path(dataset, tmp_path, monkeypatch):
+    xlsx.ingest(**dataset)
+    (tmp_path / 'other').mkdir()
+    write_workbook(tmp_path / 'other' / 'places.xlsx', ROWS[:2])
+    other = dict(dataset, xlsx_dir=str(tmp_path / 'other'),
+                 categories=[c for c in dataset_categories(str(tmp_path / 'other')) if c.name == 'places'])
+    assert xlsx.ingest(**other) == {'places': 'written'}
+    no_parsing(monkeypatch)
+    assert xlsx.ingest(**dataset) == {'places': 'skipped'}